@@ -1,54 +1,222 @@
+import argparse
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache
+
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
+import numpy as np
 import cv2
 
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".m4v", ".webm"}
+
+def enhance_array(img, clip_limit=2.0, tile_grid_size=(8, 8), clahe=None):
+    """Áp dụng CLAHE lên kênh V (HSV) của ảnh dạng mảng NumPy và trả về ảnh đã tăng cường.
+
+    clahe: đối tượng cv2.CLAHE tạo sẵn để dùng lại (khi đó bỏ qua clip_limit, tile_grid_size).
+    """
+    if clahe is None:
+        clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    h, s, v = cv2.split(hsv)
+    v_eq = clahe.apply(v)
+    hsv_eq = cv2.merge((h, s, v_eq))
+    return cv2.cvtColor(hsv_eq, cv2.COLOR_HSV2BGR)
+
+def enhance_lab(img, clip_limit=2.0, tile_grid_size=(8, 8), rgb=False):
+    """Áp dụng CLAHE lên kênh L (LAB); giữ nguyên màu tốt hơn kênh V. rgb=True nếu mảng theo thứ tự RGB."""
+    clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+    lab = cv2.cvtColor(img, cv2.COLOR_RGB2LAB if rgb else cv2.COLOR_BGR2LAB)
+    l, a, b = cv2.split(lab)
+    lab_eq = cv2.merge((clahe.apply(l), a, b))
+    return cv2.cvtColor(lab_eq, cv2.COLOR_LAB2RGB if rgb else cv2.COLOR_LAB2BGR)
+
+@lru_cache(maxsize=64)
+def gamma_table(gamma):
+    """Bảng tra 256 mức cho hiệu chỉnh gamma: gamma > 1 làm sáng, < 1 làm tối."""
+    table = 255 * (np.arange(256) / 255) ** (1 / gamma)
+    return np.rint(table).clip(0, 255).astype(np.uint8)
+
+def adjust_gamma(img, gamma=1.0):
+    return cv2.LUT(img, gamma_table(gamma))
+
+# Các phép tăng cường chọn được trên giao diện
+OPERATORS = ("hsv_clahe", "lab_clahe", "gamma")
+
+def enhance_with(img, operator="hsv_clahe", clip_limit=2.0, tile_grid_size=(8, 8), gamma=1.0, rgb=False):
+    """Tăng cường theo phép được chọn: "hsv_clahe" (như enhance_array), "lab_clahe" hoặc "gamma"."""
+    if operator == "hsv_clahe":
+        return enhance_array(img, clip_limit, tile_grid_size)
+    if operator == "lab_clahe":
+        return enhance_lab(img, clip_limit, tile_grid_size, rgb)
+    if operator == "gamma":
+        return adjust_gamma(img, gamma)
+    raise ValueError(f"Phép tăng cường không hợp lệ: {operator}")
+
+class ImagePipeline:
+    """Giải mã ảnh một lần; tăng cường ngay trên bản xem trước nhỏ, bản đầy đủ chỉ tính khi lưu.
+
+    full là mảng RGB giải mã một lần, dùng chung cho bản xem trước và bản đầy đủ.
+    Bản đầy đủ được tính ở luồng nền (OpenCV nhả GIL) và giữ lại cho lần lưu sau.
+    Các kênh HSV / LAB của bản xem trước và đối tượng CLAHE được giữ lại, nên khi
+    kéo thanh trượt chỉ phải chạy bước cuối (CLAHE, ghép kênh, đổi màu về RGB).
+    """
+
+    def __init__(self, preview_size=(300, 300)):
+        self.preview_size = preview_size
+        self.path = None
+        self.full = None
+        self.preview = None
+        self.enhanced_preview = None
+        self.enhanced_full = None
+        self.params = {}
+        self.planes = {}
+        self.clahes = {}
+        self.preview_ms = 0.0
+        self.save_thread = None
+        self.save_error = None
+
+    def open(self, path):
+        """Giải mã tệp một lần và tạo bản xem trước; trả về bản xem trước (RGB)."""
+        img = read_image(path)
+        cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)  # Đổi thứ tự kênh tại chỗ, không cấp phát thêm
+        self.path = path
+        self.full = img
+        self.preview = cv2.resize(img, self.preview_size, interpolation=cv2.INTER_AREA)
+        self.planes = {}
+        self.enhanced_preview = None
+        self.enhanced_full = None
+        return self.preview
+
+    def _planes(self, space):
+        """Các kênh của bản xem trước trong không gian màu "hsv" / "lab", tính một lần cho mỗi ảnh."""
+        planes = self.planes.get(space)
+        if planes is None:
+            # "hsv" đổi màu giống enhance_array (coi mảng là BGR) để bản xem trước khớp bản đầy đủ
+            code = cv2.COLOR_BGR2HSV if space == "hsv" else cv2.COLOR_RGB2LAB
+            planes = self.planes[space] = cv2.split(cv2.cvtColor(self.preview, code))
+        return planes
+
+    def _clahe(self, clip_limit, tile_grid_size):
+        key = (clip_limit, tuple(tile_grid_size))
+        clahe = self.clahes.get(key)
+        if clahe is None:
+            if len(self.clahes) > 32:
+                self.clahes.clear()
+            clahe = self.clahes[key] = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=key[1])
+        return clahe
+
+    def enhance_preview(self, operator="hsv_clahe", clip_limit=2.0, tile_grid_size=(8, 8), gamma=1.0):
+        """Tăng cường bản xem trước (dưới một mili giây tới vài mili giây); bản đầy đủ cũ bị bỏ."""
+        start = time.perf_counter()
+        self.params = {"operator": operator, "clip_limit": clip_limit,
+                       "tile_grid_size": tuple(tile_grid_size), "gamma": gamma}
+        if operator == "gamma":
+            out = adjust_gamma(self.preview, gamma)
+        elif operator == "hsv_clahe":
+            h, s, v = self._planes("hsv")
+            v_eq = self._clahe(clip_limit, tile_grid_size).apply(v)
+            out = cv2.cvtColor(cv2.merge((h, s, v_eq)), cv2.COLOR_HSV2BGR)
+        elif operator == "lab_clahe":
+            l, a, b = self._planes("lab")
+            l_eq = self._clahe(clip_limit, tile_grid_size).apply(l)
+            out = cv2.cvtColor(cv2.merge((l_eq, a, b)), cv2.COLOR_LAB2RGB)
+        else:
+            raise ValueError(f"Phép tăng cường không hợp lệ: {operator}")
+        self.enhanced_preview = out
+        self.enhanced_full = None
+        self.preview_ms = (time.perf_counter() - start) * 1e3
+        return out
+
+    def render_full(self):
+        full, params = self.full, self.params
+        out = self.enhanced_full
+        if out is None:
+            out = enhance_with(full, rgb=True, **params)
+            # Người dùng có thể đã mở ảnh khác / đổi tham số trong lúc tính
+            if self.full is full and self.params == params:
+                self.enhanced_full = out
+        return out
+
+    def save(self, path, quality=95):
+        out = cv2.cvtColor(self.render_full(), cv2.COLOR_RGB2BGR)
+        write_image(path, out, encode_params(os.path.splitext(path)[1], quality))
+
+    def save_async(self, path, quality=95):
+        """Tính bản đầy đủ và lưu ở luồng nền; dùng saving() / save_error để theo dõi."""
+        def target():
+            try:
+                self.save(path, quality)
+                self.save_error = None
+            except Exception as e:
+                self.save_error = e
+
+        self.save_thread = threading.Thread(target=target, daemon=True)
+        self.save_thread.start()
+
+    def saving(self):
+        return self.save_thread is not None and self.save_thread.is_alive()
+
+def show_array(img):
+    """Hiển thị mảng RGB lên image_label."""
+    photo = ImageTk.PhotoImage(Image.fromarray(img))
+    image_label.config(image=photo)
+    image_label.image = photo
+
 def open_image():
     """Mở hộp thoại chọn tệp và hiển thị ảnh đã chọn."""
-    global original_image, image_path
     image_path = filedialog.askopenfilename(
         initialdir="/",
         title="Chọn ảnh",
         filetypes=(("Image files", "*.jpg *.jpeg *.png *.bmp"), ("all files", "*.*")),
     )
     if image_path:
-        original_image = Image.open(image_path)
-        original_image = original_image.resize((300, 300))
-        photo = ImageTk.PhotoImage(original_image)
-        image_label.config(image=photo)
-        image_label.image = photo
+        try:
+            show_array(pipeline.open(image_path))
+        except ValueError as e:
+            messagebox.showerror("Lỗi", str(e))
 
 def enhance_image():
     """Tăng cường ảnh đã chọn, hiển thị kết quả và hiển thị thông báo."""
-    global original_image, enhanced_image
-    if original_image is None:
+    if pipeline.full is None:
         return
 
-    # Chuyển đổi ảnh PIL sang OpenCV
-    img = cv2.cvtColor(cv2.imread(image_path), cv2.COLOR_BGR2RGB)
-
-    # Áp dụng cân bằng biểu đồ thích ứng tương phản giới hạn (CLAHE)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-    h, s, v = cv2.split(hsv)
-    v_eq = clahe.apply(v)
-    hsv_eq = cv2.merge((h, s, v_eq))
-    enhanced_img = cv2.cvtColor(hsv_eq, cv2.COLOR_HSV2BGR)
-
-    # Chuyển đổi ảnh OpenCV sang PIL
-    enhanced_image = Image.fromarray(enhanced_img)
-    enhanced_image = enhanced_image.resize((300, 300))
-    photo = ImageTk.PhotoImage(enhanced_image)
-    image_label.config(image=photo)
-    image_label.image = photo
+    # Áp dụng cân bằng biểu đồ thích ứng tương phản giới hạn (CLAHE) trên bản xem trước
+    update_preview()
 
     # Hiển thị thông báo
     messagebox.showinfo("Thông báo", "Đã tăng cường thành công!")
 
+def current_params():
+    """Tham số tăng cường đang chọn trên các thanh trượt."""
+    tiles = tile_var.get()
+    return {"operator": operator_var.get(), "clip_limit": round(clip_var.get(), 2),
+            "tile_grid_size": (tiles, tiles), "gamma": round(gamma_var.get(), 2)}
+
+def schedule_preview(*_):
+    """Gộp các lần kéo thanh trượt liên tiếp: chỉ tính lại một lần khi giao diện rảnh."""
+    global preview_pending
+    if pipeline.enhanced_preview is None or preview_pending:
+        return
+    preview_pending = True
+    root.after_idle(update_preview)
+
+def update_preview():
+    global preview_pending
+    preview_pending = False
+    show_array(pipeline.enhance_preview(**current_params()))
+    status_label.config(text=f"Xem trước: {pipeline.preview_ms:.1f} ms")
+
 def save_image():
-    """Lưu ảnh đã được tăng cường vào tệp."""
-    global enhanced_image
-    if enhanced_image is None:
+    """Lưu ảnh đã được tăng cường (độ phân giải đầy đủ) vào tệp."""
+    if pipeline.enhanced_preview is None or pipeline.saving():
         return
 
     save_path = filedialog.asksaveasfilename(
@@ -56,27 +224,515 @@ def save_image():
         filetypes=(("JPEG", "*.jpg;*.jpeg"), ("PNG", "*.png"), ("All files", "*.*")),
     )
     if save_path:
-        enhanced_image.save(save_path)
-
-# Khởi tạo cửa sổ chính
-root = tk.Tk()
-root.title("Ứng dụng tăng cường ảnh")
-
-# Biến toàn cục để lưu trữ ảnh
-original_image = None
-enhanced_image = None
-image_path = None
-
-# Tạo các widget
-open_button = tk.Button(root, text="Mở ảnh", command=open_image)
-enhance_button = tk.Button(root, text="Tăng cường", command=enhance_image)
-save_button = tk.Button(root, text="Lưu ảnh", command=save_image)
-image_label = tk.Label(root)
-
-# Đặt vị trí cho các widget
-open_button.grid(row=0, column=0, padx=10, pady=10)
-enhance_button.grid(row=0, column=1, padx=10, pady=10)
-save_button.grid(row=0, column=2, padx=10, pady=10)
-image_label.grid(row=1, column=0, columnspan=3, padx=10, pady=10)
-
-root.mainloop()
\ No newline at end of file
+        save_button.config(state="disabled", text="Đang lưu...")
+        pipeline.save_async(save_path)
+        root.after(50, finish_save)
+
+def finish_save():
+    """Chờ luồng lưu xong (không chặn giao diện) rồi báo kết quả."""
+    if pipeline.saving():
+        root.after(50, finish_save)
+        return
+    save_button.config(state="normal", text="Lưu ảnh")
+    if pipeline.save_error is not None:
+        messagebox.showerror("Lỗi", f"Không lưu được ảnh: {pipeline.save_error}")
+
+def _clahe_layout(height, width, tile_grid_size):
+    """Kích thước sau đệm và kích thước ô lưới, giống cv2.CLAHE (đệm BORDER_REFLECT_101 khi không chia hết)."""
+    tiles_x, tiles_y = tile_grid_size
+    if height % tiles_y or width % tiles_x:
+        height += tiles_y - height % tiles_y
+        width += tiles_x - width % tiles_x
+    return height, width, height // tiles_y, width // tiles_x
+
+def _reflect101(index, size):
+    return np.where(index < size, index, 2 * size - 2 - index)
+
+def _padded_block(src, r0, r1, c0, c1):
+    """Đọc vùng [r0:r1, c0:c1] của ảnh đã đệm phản xạ, chỉ chạm tới phần ảnh gốc cần thiết."""
+    height, width = src.shape[:2]
+    if r1 <= height and c1 <= width:
+        return src[r0:r1, c0:c1]
+    rows = _reflect101(np.arange(r0, r1), height)
+    cols = _reflect101(np.arange(c0, c1), width)
+    block = src[rows.min():rows.max() + 1, cols.min():cols.max() + 1]
+    return block[rows - rows.min()][:, cols - cols.min()]
+
+def clahe_luts(hist, clip_limit, tile_pixels):
+    """Bảng tra của từng ô lưới từ histogram (tiles_y, tiles_x, 256), cắt và phân phối lại như cv2.CLAHE."""
+    hist = hist.astype(np.int64)
+    if clip_limit > 0:
+        limit = max(int(clip_limit * tile_pixels / 256), 1)
+        clipped = np.maximum(hist - limit, 0).sum(axis=-1)
+        hist = np.minimum(hist, limit) + (clipped // 256)[..., None]
+        residual = clipped % 256
+        for index in zip(*np.nonzero(residual)):
+            step = max(256 // residual[index], 1)
+            hist[index][np.arange(0, 256, step)[:residual[index]]] += 1
+    lut = np.cumsum(hist, axis=-1).astype(np.float32) * np.float32(255 / tile_pixels)
+    return np.rint(lut).clip(0, 255)
+
+def _interpolation_axis(n0, n1, tile, tiles):
+    """Theo một trục, cho các tọa độ n0..n1-1: các đoạn [đầu, cuối) có cùng cặp ô lân cận, và trọng số nội suy.
+
+    Phép tính float32 theo đúng thứ tự của cv2.CLAHE để kết quả khớp từng điểm ảnh.
+    """
+    pos = np.arange(n0, n1, dtype=np.float32) * np.float32(1 / tile) - np.float32(0.5)
+    low = np.floor(pos)
+    weight = pos - low
+    low = low.astype(np.intp)
+    cuts = [0, *(np.flatnonzero(np.diff(low)) + 1), n1 - n0]
+    segments = [(a, b, max(low[a], 0), min(low[a] + 1, tiles - 1)) for a, b in zip(cuts[:-1], cuts[1:])]
+    return segments, weight
+
+def _cell_ranges(n0, n1, cell):
+    """Chia [n0, n1) theo biên các ô lưới kích thước cell: trả (ô, đầu, cuối) tương đối với n0."""
+    return [(start // cell, start - n0, min((start // cell + 1) * cell, n1) - n0)
+            for start in [n0, *range((n0 // cell + 1) * cell, n1, cell)]]
+
+def enhance_tiled(src, dst, clip_limit=2.0, tile_grid_size=(8, 8), tile_size=1024, swap_rb=False, workers=None):
+    """CLAHE trên kênh V như enhance_array, nhưng xử lý từng khối tile_size x tile_size.
+
+    src, dst: mảng (H, W, 3) uint8, thường là np.memmap, nên bộ nhớ đỉnh chỉ phụ
+    thuộc tile_size. Lượt 1 cộng dồn histogram của từng ô lưới CLAHE trên toàn
+    ảnh; lượt 2 nội suy bảng tra theo tọa độ toàn cục. Vì thống kê là của cả ảnh
+    nên không có đường nối giữa các khối và kết quả khớp cv2.CLAHE trên ảnh đầy đủ.
+    swap_rb: đổi thứ tự kênh trước / sau như enhance_image (ảnh đọc bằng cv2 là BGR).
+    Các khối độc lập nhau nên chạy song song trên workers luồng (OpenCV / NumPy nhả GIL);
+    bộ nhớ đỉnh khoảng workers x (vài chục byte x tile_size²).
+    """
+    height, width = src.shape[:2]
+    tiles_x, tiles_y = tile_grid_size
+    padded_h, padded_w, tile_h, tile_w = _clahe_layout(height, width, tile_grid_size)
+
+    def histogram(origin):
+        r0, c0 = origin
+        r1, c1 = min(r0 + tile_size, padded_h), min(c0 + tile_size, padded_w)
+        block = _padded_block(src, r0, r1, c0, c1)
+        v = np.maximum(np.maximum(block[..., 0], block[..., 1]), block[..., 2])
+        hist = np.zeros((tiles_y, tiles_x, 256), dtype=np.int64)
+        for gy, ra, rb in _cell_ranges(r0, r1, tile_h):
+            for gx, ca, cb in _cell_ranges(c0, c1, tile_w):
+                hist[gy, gx] += np.bincount(v[ra:rb, ca:cb].ravel(), minlength=256)
+        return hist
+
+    def equalize(origin):
+        r0, c0 = origin
+        r1, c1 = min(r0 + tile_size, height), min(c0 + tile_size, width)
+        row_segments, ya = _interpolation_axis(r0, r1, tile_h, tiles_y)
+        col_segments, xa = _interpolation_axis(c0, c1, tile_w, tiles_x)
+        ya = ya[:, None]
+        ya1, xa1 = 1 - ya, 1 - xa
+
+        # cvtColor luôn tạo mảng mới: không ghi vào src (có thể là memmap chỉ đọc)
+        block = src[r0:r1, c0:c1]
+        if swap_rb:
+            block = cv2.cvtColor(block, cv2.COLOR_BGR2RGB)
+        hsv = cv2.cvtColor(block, cv2.COLOR_BGR2HSV)
+        # Trong mỗi vùng con, bốn bảng tra lân cận là cố định
+        for ra, rb, ty1, ty2 in row_segments:
+            for ca, cb, tx1, tx2 in col_segments:
+                v = hsv[ra:rb, ca:cb, 2]
+                top = luts[ty1, tx1][v] * xa1[ca:cb] + luts[ty1, tx2][v] * xa[ca:cb]
+                bottom = luts[ty2, tx1][v] * xa1[ca:cb] + luts[ty2, tx2][v] * xa[ca:cb]
+                hsv[ra:rb, ca:cb, 2] = np.rint(top * ya1[ra:rb] + bottom * ya[ra:rb])
+        out = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+        if swap_rb:
+            cv2.cvtColor(out, cv2.COLOR_RGB2BGR, dst=out)
+        dst[r0:r1, c0:c1] = out
+
+    def origins(rows, cols):
+        return ((r0, c0) for r0 in range(0, rows, tile_size) for c0 in range(0, cols, tile_size))
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        # Lượt 1: histogram kênh V (= max của ba kênh) theo từng ô lưới, kể cả phần đệm
+        luts = clahe_luts(sum(pool.map(histogram, origins(padded_h, padded_w))),
+                          clip_limit, tile_h * tile_w)
+        # Lượt 2: nội suy song tuyến bảng tra của bốn ô lân cận cho từng điểm ảnh
+        for _ in pool.map(equalize, origins(height, width)):
+            pass
+    if isinstance(dst, np.memmap):
+        dst.flush()
+    return dst
+
+def open_large_image(path):
+    """Ảnh .npy được ánh xạ bộ nhớ (không nạp vào RAM); định dạng khác phải giải mã toàn bộ một lần."""
+    if path.lower().endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    return read_image(path)
+
+def enhance_large_image(src_path, dst_path, clip_limit=2.0, tile_grid_size=(8, 8), tile_size=1024,
+                        quality=95, png_compression=3, workers=None):
+    """Tăng cường một ảnh rất lớn theo khối; đầu ra .npy được ghi dần từng khối vào tệp ánh xạ bộ nhớ.
+
+    Đầu ra dạng ảnh (jpg, png...) được ghi vào tệp tạm ánh xạ bộ nhớ rồi mã hóa một lần ở cuối.
+    """
+    src = open_large_image(src_path)
+    if dst_path.lower().endswith(".npy"):
+        dst = np.lib.format.open_memmap(dst_path, mode="w+", dtype=np.uint8, shape=src.shape)
+        enhance_tiled(src, dst, clip_limit, tile_grid_size, tile_size, swap_rb=True, workers=workers)
+        del dst
+        return
+
+    fd, scratch = tempfile.mkstemp(suffix=".npy", dir=os.path.dirname(os.path.abspath(dst_path)))
+    os.close(fd)
+    try:
+        dst = np.lib.format.open_memmap(scratch, mode="w+", dtype=np.uint8, shape=src.shape)
+        enhance_tiled(src, dst, clip_limit, tile_grid_size, tile_size, swap_rb=True, workers=workers)
+        write_image(dst_path, dst, encode_params(os.path.splitext(dst_path)[1], quality, png_compression))
+        del dst
+    finally:
+        os.remove(scratch)
+
+def open_frames(source):
+    """Trả về (fps, dòng khung hình BGR) từ tệp video hoặc thư mục ảnh (theo thứ tự tên); fps None nếu không rõ."""
+    if os.path.isdir(source):
+        return None, (read_image(path) for path in find_images(source))
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Không mở được video: {source}")
+
+    def frames():
+        try:
+            while True:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                yield frame
+        finally:
+            capture.release()
+    return capture.get(cv2.CAP_PROP_FPS) or None, frames()
+
+def enhance_stream(frames, clip_limit=2.0, tile_grid_size=(8, 8), workers=None, max_in_flight=None):
+    """Tăng cường một dòng khung hình theo đường ống: giải mã -> tăng cường song song -> trả về đúng thứ tự.
+
+    Một luồng đọc khung hình, workers luồng tăng cường (mỗi luồng một đối tượng
+    CLAHE dùng lại cho mọi khung hình; OpenCV nhả GIL nên chạy song song thật),
+    còn nơi gọi nhận kết quả theo thứ tự và mã hóa. Tối đa max_in_flight khung
+    hình nằm trong đường ống, nên bộ nhớ không phụ thuộc độ dài video.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    slots = threading.Semaphore(max_in_flight)
+    tasks = queue.Queue(max_in_flight)
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def decode():
+        try:
+            for index, frame in enumerate(frames):
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                tasks.put((index, frame))
+        except Exception as e:
+            results.put((None, e))
+        finally:
+            for _ in range(workers):
+                tasks.put(None)
+
+    def enhance():
+        clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+        while True:
+            try:
+                task = tasks.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return
+                continue
+            if task is None:
+                results.put(None)
+                return
+            index, frame = task
+            try:
+                # Cùng thứ tự kênh với enhance_image để kết quả giống bản giao diện
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                out = cv2.cvtColor(enhance_array(rgb, clahe=clahe), cv2.COLOR_RGB2BGR)
+                results.put((index, out))
+            except Exception as e:
+                results.put((None, e))
+
+    threads = [threading.Thread(target=decode, daemon=True)]
+    threads += [threading.Thread(target=enhance, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    # Khung hình xong sớm chờ trong reorder cho tới khi tới lượt
+    reorder = {}
+    next_index = 0
+    running = workers
+    try:
+        while running:
+            item = results.get()
+            if item is None:
+                running -= 1
+                continue
+            index, value = item
+            if index is None:
+                raise value
+            reorder[index] = value
+            while next_index in reorder:
+                yield reorder.pop(next_index)
+                next_index += 1
+                slots.release()
+    finally:
+        stop.set()
+        # Giải phóng các luồng đang chờ để chúng tự kết thúc
+        while any(thread.is_alive() for thread in threads):
+            try:
+                tasks.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                results.get(timeout=0.01)
+            except queue.Empty:
+                pass
+
+def enhance_video(source, target, clip_limit=2.0, tile_grid_size=(8, 8), workers=None,
+                  max_in_flight=None, fps=None, fourcc="mp4v"):
+    """Tăng cường video / dãy ảnh source, ghi ra tệp video hoặc thư mục ảnh target.
+
+    Trả về (số khung hình, thời gian, fps của nguồn).
+    """
+    source_fps, frames = open_frames(source)
+    fps = fps or source_fps or 25.0
+    to_video = os.path.splitext(target)[1].lower() in VIDEO_EXTENSIONS
+    writer = None
+    count = 0
+    start = time.perf_counter()
+    try:
+        for frame in enhance_stream(frames, clip_limit, tile_grid_size, workers, max_in_flight):
+            if to_video:
+                if writer is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+                    writer = cv2.VideoWriter(target, cv2.VideoWriter_fourcc(*fourcc), fps,
+                                             (frame.shape[1], frame.shape[0]))
+                    if not writer.isOpened():
+                        raise ValueError(f"Không ghi được video: {target} (fourcc {fourcc})")
+                writer.write(frame)
+            else:
+                write_image(os.path.join(target, f"frame_{count:06d}.png"), frame)
+            count += 1
+    finally:
+        if writer is not None:
+            writer.release()
+    return count, time.perf_counter() - start, source_fps
+
+def find_images(root, exclude=None):
+    """Duyệt cây thư mục (theo thứ tự tên), trả về dần đường dẫn các tệp ảnh.
+
+    exclude: thư mục bỏ qua khi duyệt (vd. thư mục đầu ra nằm bên trong root).
+    """
+    exclude = os.path.realpath(exclude) if exclude else None
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if os.path.realpath(os.path.join(dirpath, d)) != exclude)
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                yield os.path.join(dirpath, name)
+
+def output_path(src_root, dst_root, path, fmt=None):
+    """Đường dẫn đầu ra giữ nguyên cấu trúc thư mục; fmt (vd. "jpg") thì đổi đuôi tệp."""
+    rel = os.path.relpath(path, src_root)
+    if fmt:
+        rel = os.path.splitext(rel)[0] + "." + fmt.lstrip(".")
+    return os.path.join(dst_root, rel)
+
+def encode_params(ext, quality=95, png_compression=3):
+    """Tham số nén của cv2.imencode theo định dạng đầu ra."""
+    ext = ext.lower()
+    if ext in (".jpg", ".jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if ext == ".webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    if ext == ".png":
+        return [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+    return []
+
+def read_image(path):
+    """Đọc ảnh (BGR) qua np.fromfile để đọc được cả đường dẫn có dấu tiếng Việt."""
+    img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError(f"Không đọc được ảnh: {path}")
+    return img
+
+def write_image(path, img, params=()):
+    """Ghi ảnh ra tệp tạm rồi đổi tên, để tệp dở dang không bị coi là đã xử lý."""
+    ext = os.path.splitext(path)[1]
+    ok, buf = cv2.imencode(ext, img, list(params))
+    if not ok:
+        raise ValueError(f"Không mã hóa được ảnh: {path}")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".part"
+    buf.tofile(tmp)
+    os.replace(tmp, path)
+    return buf.nbytes
+
+def _init_batch_worker():
+    # Mỗi tiến trình xử lý một ảnh; tắt đa luồng của OpenCV để không tranh CPU giữa các tiến trình
+    cv2.setNumThreads(1)
+
+def _enhance_file(src, dst, clip_limit, tile_grid_size, params):
+    """Việc của một tiến trình con: đọc, tăng cường, ghi; trả về (src, số điểm ảnh, số byte đọc, số byte ghi)."""
+    img = read_image(src)
+    # Cùng thứ tự kênh với enhance_image (ảnh RGB) để kết quả giống hệt bản giao diện
+    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    out = cv2.cvtColor(enhance_array(rgb, clip_limit, tile_grid_size), cv2.COLOR_RGB2BGR)
+    written = write_image(dst, out, params)
+    return src, img.shape[0] * img.shape[1], os.path.getsize(src), written
+
+def enhance_folder(src_root, dst_root, fmt=None, quality=95, png_compression=3, clip_limit=2.0,
+                   tile_grid_size=(8, 8), workers=None, max_in_flight=None, overwrite=False):
+    """Tăng cường mọi ảnh trong cây thư mục src_root bằng nhiều tiến trình, ghi sang dst_root.
+
+    Chỉ gửi đường dẫn cho tiến trình con và giữ tối đa max_in_flight ảnh đang xử lý,
+    nên bộ nhớ bị chặn trên bất kể thư mục lớn bao nhiêu. Ảnh đã có đầu ra mới hơn
+    ảnh gốc thì bỏ qua (trừ khi overwrite). Trả về dần (trạng thái, src, thông tin).
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as pool:
+        pending = {}
+
+        def finished():
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                src = pending.pop(future)
+                try:
+                    yield "ok", src, future.result()
+                except Exception as e:
+                    yield "error", src, str(e)
+
+        # Thư mục đầu ra nằm trong src_root thì không tăng cường lại chính ảnh đã ghi
+        for src in find_images(src_root, exclude=dst_root):
+            dst = output_path(src_root, dst_root, src, fmt)
+            if not overwrite and os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+                yield "skipped", src, None
+                continue
+            params = encode_params(os.path.splitext(dst)[1], quality, png_compression)
+            pending[pool.submit(_enhance_file, src, dst, clip_limit, tile_grid_size, params)] = src
+            if len(pending) >= max_in_flight:
+                yield from finished()
+        while pending:
+            yield from finished()
+
+def main(argv=None):
+    """Chế độ dòng lệnh: tăng cường hàng loạt ảnh trong thư mục, hoặc một ảnh rất lớn theo khối."""
+    parser = argparse.ArgumentParser(description="Tăng cường hàng loạt ảnh (CLAHE trên kênh V).")
+    parser.add_argument("input", help="Thư mục ảnh gốc (duyệt cả thư mục con), hoặc một tệp ảnh / .npy rất lớn")
+    parser.add_argument("output", help="Thư mục ghi ảnh đã tăng cường (hoặc tệp đầu ra nếu input là tệp)")
+    parser.add_argument("--format", choices=["jpg", "png", "webp", "bmp", "tif"],
+                        help="Định dạng đầu ra (mặc định giữ như ảnh gốc)")
+    parser.add_argument("--quality", type=int, default=95, help="Chất lượng JPEG / WebP (0-100)")
+    parser.add_argument("--png-compression", type=int, default=3, help="Mức nén PNG (0-9)")
+    parser.add_argument("--clip-limit", type=float, default=2.0, help="clipLimit của CLAHE")
+    parser.add_argument("--tile-grid", type=int, default=8, help="Số ô lưới CLAHE mỗi chiều")
+    parser.add_argument("--workers", type=int, default=None, help="Số tiến trình")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Số ảnh tối đa đang xử lý cùng lúc")
+    parser.add_argument("--overwrite", action="store_true", help="Xử lý lại cả ảnh đã có đầu ra")
+    parser.add_argument("--tile-size", type=int, default=1024, help="Cạnh khối khi xử lý một ảnh lớn theo khối")
+    parser.add_argument("--sequence", action="store_true",
+                        help="Coi thư mục input là dãy khung hình (như video), không phải một lô ảnh")
+    parser.add_argument("--fps", type=float, default=None, help="fps của video đầu ra (mặc định theo nguồn)")
+    parser.add_argument("--fourcc", default="mp4v", help="Mã codec khi ghi video (vd. mp4v, XVID, MJPG)")
+    args = parser.parse_args(argv)
+
+    is_video = os.path.splitext(args.input)[1].lower() in VIDEO_EXTENSIONS
+    if is_video or args.sequence:
+        # Các luồng đã chạy song song theo khung hình; tắt đa luồng bên trong OpenCV để không tranh CPU
+        cv2.setNumThreads(1)
+        count, elapsed, source_fps = enhance_video(args.input, args.output, args.clip_limit,
+                                                   (args.tile_grid, args.tile_grid), args.workers,
+                                                   args.max_in_flight, args.fps, args.fourcc)
+        elapsed = max(elapsed, 1e-9)
+        report = f"Đã xử lý {count} khung hình trong {elapsed:.2f} s: {count / elapsed:.1f} fps"
+        if source_fps:
+            report += f" (x{count / elapsed / source_fps:.2f} so với thời gian thực {source_fps:.1f} fps)"
+        print(report, file=sys.stderr)
+        return 0
+
+    if os.path.isfile(args.input):
+        start = time.perf_counter()
+        enhance_large_image(args.input, args.output, args.clip_limit, (args.tile_grid, args.tile_grid),
+                            args.tile_size, args.quality, args.png_compression, args.workers)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(f"Đã xử lý {args.input} theo khối trong {elapsed:.2f} s", file=sys.stderr)
+        return 0
+    if not os.path.isdir(args.input):
+        parser.error(f"không tìm thấy tệp hoặc thư mục: {args.input}")
+
+    start = time.perf_counter()
+    last_report = start
+    counts = {"ok": 0, "skipped": 0, "error": 0}
+    pixels = bytes_in = bytes_out = 0
+    for status, src, info in enhance_folder(args.input, args.output, args.format, args.quality,
+                                            args.png_compression, args.clip_limit,
+                                            (args.tile_grid, args.tile_grid), args.workers,
+                                            args.max_in_flight, args.overwrite):
+        counts[status] += 1
+        if status == "ok":
+            pixels += info[1]
+            bytes_in += info[2]
+            bytes_out += info[3]
+        elif status == "error":
+            print(f"Lỗi: {src}: {info}", file=sys.stderr)
+
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            last_report = now
+            print(f"... {counts['ok']} ảnh ({counts['ok'] / (now - start):.1f} ảnh/s)", file=sys.stderr)
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"Đã xử lý {counts['ok']} ảnh, bỏ qua {counts['skipped']}, lỗi {counts['error']} "
+          f"trong {elapsed:.2f} s: {counts['ok'] / elapsed:.1f} ảnh/s, "
+          f"{pixels / elapsed / 1e6:.1f} MP/s, đọc {bytes_in / elapsed / 2**20:.1f} MB/s, "
+          f"ghi {bytes_out / elapsed / 2**20:.1f} MB/s", file=sys.stderr)
+    return 1 if counts["error"] else 0
+
+# Ảnh đang mở (giải mã một lần, dùng chung cho xem trước và lưu)
+pipeline = ImagePipeline()
+preview_pending = False
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
+
+    # Khởi tạo cửa sổ chính
+    root = tk.Tk()
+    root.title("Ứng dụng tăng cường ảnh")
+
+    # Tạo các widget
+    open_button = tk.Button(root, text="Mở ảnh", command=open_image)
+    enhance_button = tk.Button(root, text="Tăng cường", command=enhance_image)
+    save_button = tk.Button(root, text="Lưu ảnh", command=save_image)
+    image_label = tk.Label(root)
+
+    # Đặt vị trí cho các widget
+    open_button.grid(row=0, column=0, padx=10, pady=10)
+    enhance_button.grid(row=0, column=1, padx=10, pady=10)
+    save_button.grid(row=0, column=2, padx=10, pady=10)
+    image_label.grid(row=1, column=0, columnspan=3, padx=10, pady=10)
+
+    # Tham số tăng cường: kéo thanh trượt thì bản xem trước cập nhật ngay
+    controls = tk.Frame(root)
+    controls.grid(row=2, column=0, columnspan=3, padx=10, pady=5, sticky="ew")
+    operator_var = tk.StringVar(root, value=OPERATORS[0])
+    clip_var = tk.DoubleVar(root, value=2.0)
+    tile_var = tk.IntVar(root, value=8)
+    gamma_var = tk.DoubleVar(root, value=1.0)
+    tk.Label(controls, text="Phép:").grid(row=0, column=0, sticky="w")
+    tk.OptionMenu(controls, operator_var, *OPERATORS, command=schedule_preview).grid(row=0, column=1, sticky="w")
+    tk.Scale(controls, label="clipLimit", variable=clip_var, from_=0.5, to=8.0, resolution=0.1,
+             orient="horizontal", command=schedule_preview).grid(row=1, column=0, columnspan=2, sticky="ew")
+    tk.Scale(controls, label="Lưới CLAHE", variable=tile_var, from_=2, to=16, resolution=1,
+             orient="horizontal", command=schedule_preview).grid(row=2, column=0, columnspan=2, sticky="ew")
+    tk.Scale(controls, label="Gamma", variable=gamma_var, from_=0.2, to=3.0, resolution=0.05,
+             orient="horizontal", command=schedule_preview).grid(row=3, column=0, columnspan=2, sticky="ew")
+    status_label = tk.Label(controls, text="")
+    status_label.grid(row=4, column=0, columnspan=2, sticky="w")
+    controls.columnconfigure(1, weight=1)
+
+    root.mainloop()
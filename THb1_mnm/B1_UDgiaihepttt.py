@@ -1,33 +1,617 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+
 import numpy as np
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, filedialog, messagebox
+
+# Trạng thái nghiệm của từng hệ khi giải theo lô
+UNIQUE = 0
+NO_SOLUTION = 1
+INFINITE_SOLUTIONS = 2
+
+STATUS_TEXT = {
+    UNIQUE: "Nghiệm duy nhất",
+    NO_SOLUTION: "Vô nghiệm",
+    INFINITE_SOLUTIONS: "Vô số nghiệm",
+}
+
+class SparseMatrix:
+    """ Ma trận thưa lưu theo dạng CSR: data, indices (cột), indptr (đầu mỗi hàng). """
+
+    def __init__(self, data, indices, indptr, shape):
+        self.data = np.asarray(data, dtype=float)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.shape = tuple(shape)
+        self._rows = None
+
+    @classmethod
+    def from_coo(cls, row, col, data, shape):
+        """ Tạo từ dạng tọa độ (COO); các phần tử trùng vị trí được cộng dồn. """
+        row = np.asarray(row, dtype=np.int64)
+        col = np.asarray(col, dtype=np.int64)
+        data = np.asarray(data, dtype=float)
+
+        keys, inverse = np.unique(row * shape[1] + col, return_inverse=True)
+        data = np.bincount(inverse, weights=data, minlength=len(keys))
+        row, col = np.divmod(keys, shape[1])
+
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row, minlength=shape[0]), out=indptr[1:])
+        return cls(data, col, indptr, shape)
+
+    @classmethod
+    def from_dense(cls, M):
+        M = np.asarray(M, dtype=float)
+        row, col = np.nonzero(M)
+        return cls.from_coo(row, col, M[row, col], M.shape)
+
+    @classmethod
+    def from_scipy(cls, M):
+        """ Chuyển từ một ma trận scipy.sparse bất kỳ (có .tocoo()). """
+        coo = M.tocoo()
+        return cls.from_coo(coo.row, coo.col, coo.data, coo.shape)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    @property
+    def rows(self):
+        """ Chỉ số hàng của từng phần tử khác 0 (tính một lần rồi giữ lại). """
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        return self._rows
+
+    def __matmul__(self, x):
+        return np.bincount(self.rows, weights=self.data * x[self.indices], minlength=self.shape[0])
+
+    def diagonal(self):
+        d = np.zeros(min(self.shape))
+        on_diag = self.rows == self.indices
+        d[self.rows[on_diag]] = self.data[on_diag]
+        return d
+
+    def transpose(self):
+        return SparseMatrix.from_coo(self.indices, self.rows, self.data, self.shape[::-1])
+
+    def is_symmetric(self, tol=1e-12):
+        T = self.transpose()
+        return (self.shape == T.shape
+                and np.array_equal(self.indptr, T.indptr)
+                and np.array_equal(self.indices, T.indices)
+                and np.allclose(self.data, T.data, atol=tol))
+
+    def toarray(self):
+        M = np.zeros(self.shape)
+        M[self.rows, self.indices] = self.data
+        return M
+
+
+def jacobi_preconditioner(A):
+    """ Tiền xử lý Jacobi: z = r / diag(A). """
+    d = A.diagonal() if isinstance(A, SparseMatrix) else np.diag(A).astype(float)
+    if np.any(d == 0):
+        raise ValueError("Đường chéo có phần tử 0, không dùng được tiền xử lý Jacobi.")
+    inv_d = 1.0 / d
+    return lambda r: inv_d * r
+
+
+def _triangular_levels(rows, cols, vals, n, lower):
+    """ Chia các hàng của ma trận tam giác thành các mức độc lập để giải theo mảng. """
+    level = np.zeros(n, dtype=np.int64)
+    order = range(n) if lower else range(n - 1, -1, -1)
+    starts = np.searchsorted(rows, np.arange(n + 1))
+    for i in order:
+        deps = cols[starts[i]:starts[i + 1]]
+        if len(deps):
+            level[i] = level[deps].max() + 1
+
+    schedule = []
+    row_order = np.argsort(level, kind="stable")
+    row_bounds = np.searchsorted(level[row_order], np.arange(level.max() + 2))
+    entry_level = level[rows]
+    entry_order = np.argsort(entry_level, kind="stable")
+    entry_bounds = np.searchsorted(entry_level[entry_order], np.arange(level.max() + 2))
+
+    local = np.empty(n, dtype=np.int64)
+    for lv in range(level.max() + 1):
+        lv_rows = row_order[row_bounds[lv]:row_bounds[lv + 1]]
+        local[lv_rows] = np.arange(len(lv_rows))
+        e = entry_order[entry_bounds[lv]:entry_bounds[lv + 1]]
+        schedule.append((lv_rows, local[rows[e]], cols[e], vals[e]))
+    return schedule
+
+
+def _solve_levels(schedule, b, diag=None):
+    y = np.array(b, dtype=float)
+    for lv_rows, local, cols, vals in schedule:
+        acc = np.bincount(local, weights=vals * y[cols], minlength=len(lv_rows))
+        y[lv_rows] = b[lv_rows] - acc
+        if diag is not None:
+            y[lv_rows] /= diag[lv_rows]
+    return y
+
+
+def ilu0_preconditioner(A):
+    """ Tiền xử lý ILU(0): phân tích LU không thêm phần tử mới ngoài mẫu của A.
+
+    Giới hạn kích thước: phân tích là vòng Python theo từng hàng (~20 µs mỗi hàng), và
+    mỗi lần áp dụng tốn một bước mảng cho mỗi mức của L, U. Lưới 2D/3D có ít mức
+    (lưới 300 x 300: áp dụng ~10 ms), nhưng ma trận dải như ba đường chéo có n mức:
+    với n = 2e5, phân tích mất ~4 s và mỗi lần áp dụng ~1.5 s. Khi n lớn, tiền xử lý
+    "auto" của iterative_solve dùng Jacobi (xem ILU0_AUTO_MAX_N).
+    """
+    if not isinstance(A, SparseMatrix):
+        A = SparseMatrix.from_dense(A)
+    n = A.shape[0]
+    data = A.data.copy()
+    indices, indptr = A.indices, A.indptr
+
+    diag_pos = np.full(n, -1, dtype=np.int64)
+    on_diag = A.rows == indices
+    diag_pos[A.rows[on_diag]] = np.nonzero(on_diag)[0]
+    if np.any(diag_pos < 0):
+        raise ValueError("Thiếu phần tử trên đường chéo, không phân tích ILU(0) được.")
+
+    work = np.full(n, -1, dtype=np.int64)
+    for i in range(n):
+        start, end = indptr[i], indptr[i + 1]
+        work[indices[start:end]] = np.arange(start, end)
+        for p in range(start, diag_pos[i]):
+            k = indices[p]
+            if data[diag_pos[k]] == 0:
+                raise ValueError("Gặp phần tử trụ bằng 0 khi phân tích ILU(0).")
+            data[p] /= data[diag_pos[k]]
+            k_start, k_end = diag_pos[k] + 1, indptr[k + 1]
+            pos = work[indices[k_start:k_end]]
+            hit = pos >= 0
+            data[pos[hit]] -= data[p] * data[k_start:k_end][hit]
+        work[indices[start:end]] = -1
+
+    if np.any(data[diag_pos] == 0):
+        raise ValueError("Gặp phần tử trụ bằng 0 khi phân tích ILU(0).")
+
+    rows = A.rows
+    lower = indices < rows
+    upper = indices > rows
+    L_levels = _triangular_levels(rows[lower], indices[lower], data[lower], n, lower=True)
+    U_levels = _triangular_levels(rows[upper], indices[upper], data[upper], n, lower=False)
+    U_diag = data[diag_pos]
+    return lambda r: _solve_levels(U_levels, _solve_levels(L_levels, r), U_diag)
+
+
+PRECONDITIONERS = {
+    "jacobi": jacobi_preconditioner,
+    "ilu0": ilu0_preconditioner,
+}
+
+# preconditioner="auto": ILU(0) tới cỡ này, lớn hơn thì dùng Jacobi (xem ilu0_preconditioner)
+ILU0_AUTO_MAX_N = 20000
+
+
+def conjugate_gradient(A, b, M, x0, tol, maxiter):
+    """ Gradient liên hợp có tiền xử lý, dành cho ma trận đối xứng xác định dương. """
+    x = x0.copy()
+    r = b - A @ x
+    b_norm = np.linalg.norm(b) or 1.0
+    history = [np.linalg.norm(r) / b_norm]
+    z = M(r)
+    p = z.copy()
+    rz = r @ z
+
+    for _ in range(maxiter):
+        if history[-1] < tol:
+            break
+        Ap = A @ p
+        pAp = p @ Ap
+        if pAp <= 0:
+            # A không xác định dương (vd. suy biến): dừng thay vì chia cho 0
+            break
+        alpha = rz / pAp
+        x += alpha * p
+        r -= alpha * Ap
+        history.append(np.linalg.norm(r) / b_norm)
+        z = M(r)
+        rz_new = r @ z
+        p = z + (rz_new / rz) * p
+        rz = rz_new
+    return x, history
+
+
+def bicgstab(A, b, M, x0, tol, maxiter):
+    """ BiCGSTAB có tiền xử lý phía phải, cho ma trận không đối xứng. """
+    x = x0.copy()
+    r = b - A @ x
+    r_hat = r.copy()
+    b_norm = np.linalg.norm(b) or 1.0
+    history = [np.linalg.norm(r) / b_norm]
+    rho = alpha = omega = 1.0
+    v = np.zeros_like(b)
+    p = np.zeros_like(b)
+
+    for _ in range(maxiter):
+        if history[-1] < tol:
+            break
+        rho_new = r_hat @ r
+        if rho_new == 0:
+            break
+        p = r + (rho_new / rho) * (alpha / omega) * (p - omega * v)
+        p_hat = M(p)
+        v = A @ p_hat
+        alpha = rho_new / (r_hat @ v)
+        s = r - alpha * v
+        if np.linalg.norm(s) / b_norm < tol:
+            x += alpha * p_hat
+            history.append(np.linalg.norm(s) / b_norm)
+            break
+        s_hat = M(s)
+        t = A @ s_hat
+        omega = (t @ s) / (t @ t)
+        x += alpha * p_hat + omega * s_hat
+        r = s - omega * t
+        rho = rho_new
+        history.append(np.linalg.norm(r) / b_norm)
+        if omega == 0:
+            break
+    return x, history
+
+
+def gmres(A, b, M, x0, tol, maxiter, restart=30):
+    """ GMRES khởi động lại sau `restart` bước, tiền xử lý phía phải. """
+    x = x0.copy()
+    n = len(b)
+    b_norm = np.linalg.norm(b) or 1.0
+    r = b - A @ x
+    history = [np.linalg.norm(r) / b_norm]
+    iterations = 0
+
+    while iterations < maxiter and history[-1] >= tol:
+        beta = np.linalg.norm(r)
+        m = min(restart, maxiter - iterations)
+        V = np.zeros((m + 1, n))
+        Z = np.zeros((m, n))
+        H = np.zeros((m + 1, m))
+        cs = np.zeros(m)
+        sn = np.zeros(m)
+        g = np.zeros(m + 1)
+        g[0] = beta
+        V[0] = r / beta
+
+        j = 0
+        for j in range(m):
+            Z[j] = M(V[j])
+            w = A @ Z[j]
+            for i in range(j + 1):
+                H[i, j] = w @ V[i]
+                w -= H[i, j] * V[i]
+            H[j + 1, j] = np.linalg.norm(w)
+            if H[j + 1, j] != 0:
+                V[j + 1] = w / H[j + 1, j]
+
+            # Xoay Givens để đưa H về dạng tam giác trên
+            for i in range(j):
+                H[i, j], H[i + 1, j] = (cs[i] * H[i, j] + sn[i] * H[i + 1, j],
+                                        -sn[i] * H[i, j] + cs[i] * H[i + 1, j])
+            denom = np.hypot(H[j, j], H[j + 1, j])
+            cs[j], sn[j] = H[j, j] / denom, H[j + 1, j] / denom
+            H[j, j] = denom
+            H[j + 1, j] = 0.0
+            g[j + 1] = -sn[j] * g[j]
+            g[j] = cs[j] * g[j]
+
+            iterations += 1
+            history.append(abs(g[j + 1]) / b_norm)
+            if history[-1] < tol:
+                break
+
+        k = j + 1
+        y = np.linalg.solve(np.triu(H[:k, :k]), g[:k])
+        x += Z[:k].T @ y
+        r = b - A @ x
+        history[-1] = np.linalg.norm(r) / b_norm
+    return x, history
+
+
+ITERATIVE_METHODS = {
+    "cg": conjugate_gradient,
+    "bicgstab": bicgstab,
+    "gmres": gmres,
+}
+
+
+def zero_tolerance(M):
+    """ Ngưỡng coi một giá trị là 0 sau khi khử: n * eps * max|M| (n là số hàng của M).
+
+    Khi chọn trụ theo cột, ma trận suy biến để lại phần tử trụ cỡ 1e-16 chứ không đúng bằng 0.
+    """
+    M = np.asarray(M, dtype=float)
+    if M.size == 0:
+        return 0.0
+    return M.shape[0] * np.finfo(float).eps * float(np.max(np.abs(M)))
+
+
+def _rhs_tolerance(b):
+    """ Ngưỡng coi vế phải sau khử là 0: n * eps * sum|b|.
+
+    Mỗi vế phải sau khử là tổ hợp của mọi b_j (hệ số <= 1 khi chọn trụ theo cột), nên
+    sai số làm tròn tỉ lệ với tổng |b_j| chứ không chỉ max|b|.
+    """
+    b = np.asarray(b, dtype=float)
+    return len(b) * np.finfo(float).eps * float(np.abs(b).sum())
+
+
+def singular_status(A, b):
+    """ Kết luận cho hệ suy biến: "Vô nghiệm" nếu hạng [A|b] lớn hơn hạng A, ngược lại "Vô số nghiệm".
+
+    Khử về dạng bậc thang có chọn trụ theo cột; trụ dưới zero_tolerance(A) và vế phải
+    dưới _rhs_tolerance(b) được coi là 0.
+    """
+    A = np.array(A, dtype=float)
+    b = np.array(b, dtype=float)
+    n, m = A.shape
+    pivot_tol = zero_tolerance(A)
+    rhs_tol = _rhs_tolerance(b)
+    Ab = np.column_stack((A, b))
+
+    row = 0
+    for col in range(m):
+        if row == n:
+            break
+        p = row + np.argmax(np.abs(Ab[row:, col]))
+        if abs(Ab[p, col]) <= pivot_tol:
+            continue
+        if p != row:
+            Ab[[row, p]] = Ab[[p, row]]
+        Ab[row + 1:] -= np.outer(Ab[row + 1:, col] / Ab[row, col], Ab[row])
+        row += 1
+
+    return "Vô nghiệm" if np.any(np.abs(Ab[row:, m]) > rhs_tol) else "Vô số nghiệm"
+
+
+def blocked_gaussian_elimination(A, b, block_size=64, workers=None):
+    """ Khử Gauss theo khối (panel + cập nhật phần còn lại) trên nhiều luồng.
+
+    Trả về nghiệm, hoặc "Vô nghiệm" / "Vô số nghiệm" như gaussian_elimination.
+    """
+    n = len(b)
+    workers = workers or os.cpu_count() or 1
+    W = np.empty((n, n + 1))
+    W[:, :n] = A
+    W[:, n] = b
+    tol = zero_tolerance(W[:, :n])
+
+    def trailing_update(r0, r1, k, e):
+        W[r0:r1, e:n] -= W[r0:r1, k:e] @ W[k:e, e:n]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for k in range(0, n, block_size):
+            e = min(k + block_size, n)
+
+            # Khử trong panel: các cột k..e-1 và cột vế phải được cập nhật ngay
+            for i in range(k, e):
+                p = i + np.argmax(np.abs(W[i:, i]))
+                if p != i:
+                    W[[i, p]] = W[[p, i]]
+
+                pivot = W[i, i]
+                if abs(pivot) <= tol:
+                    return singular_status(A, b)
+
+                W[i + 1:, i] /= pivot
+                W[i + 1:, i + 1:e] -= np.outer(W[i + 1:, i], W[i, i + 1:e])
+                W[i + 1:, n] -= W[i + 1:, i] * W[i, n]
+
+            # Các hàng của panel ở phần bên phải: giải tam giác dưới với L11
+            for i in range(k, e):
+                W[i + 1:e, e:n] -= np.outer(W[i + 1:e, i], W[i, e:n])
+
+            # Cập nhật khối còn lại, chia theo nhóm hàng cho các luồng
+            if e < n:
+                bounds = np.linspace(e, n, min(workers, n - e) + 1).astype(int)
+                jobs = [pool.submit(trailing_update, r0, r1, k, e)
+                        for r0, r1 in zip(bounds[:-1], bounds[1:]) if r1 > r0]
+                for job in jobs:
+                    job.result()
+
+    x = np.zeros(n)
+    for i in range(n - 1, -1, -1):
+        x[i] = (W[i, n] - W[i, i + 1:n] @ x[i + 1:]) / W[i, i]
+    return x
+
+def _open_matrix(A, mode):
+    """ Mở ma trận dạng np.memmap, đường dẫn .npy hoặc mảng mà không nạp toàn bộ vào RAM. """
+    if isinstance(A, (str, os.PathLike)):
+        return np.load(A, mmap_mode=mode)
+    return A
+
+
+def out_of_core_gaussian_elimination(A, b, memory_budget=256 * 2**20,
+                                     scratch_path=None, in_place=False):
+    """ Khử Gauss cho ma trận nằm trên đĩa, đọc/ghi theo từng dải hàng.
+
+    A là np.memmap hoặc đường dẫn .npy. Nếu in_place=False, A được chép từng dải
+    sang một memmap tạm (scratch_path, mặc định là tệp tạm cạnh tệp của A) rồi khử
+    trên đó. Bộ nhớ dùng thêm không vượt quá memory_budget byte (ngoài vector b và
+    x, cỡ O(n)).
+
+    Cột có trụ dưới ngưỡng zero_tolerance (phụ thuộc các cột trước) được loại và thay
+    bằng cột cuối chưa xét, nên hệ suy biến được kết luận "Vô nghiệm" / "Vô số nghiệm"
+    như gaussian_elimination mà không phải nạp cả A.
+    """
+    A = _open_matrix(A, "r+" if in_place else "r")
+    b = np.array(b, dtype=float)
+    n = len(b)
+
+    # Các khối n x nb cùng lúc trong RAM: panel, U12, kết quả tạm của tích ngoài / nhân ma trận,
+    # cộng một khối dự phòng cho các mảng tạm nhỏ hơn (đổi hàng, chỉ số nâng cao)
+    nb = int(max(1, min(n, memory_budget // (4 * n * 8))))
+
+    scratch_file = None
+    if in_place:
+        if not np.issubdtype(A.dtype, np.floating):
+            raise ValueError("Khử tại chỗ cần ma trận kiểu số thực.")
+        if not A.flags.writeable:
+            raise ValueError("Khử tại chỗ cần ma trận ghi được (memmap mở với mode 'r+' hoặc 'w+').")
+        W = A
+        scale = max((float(np.abs(A[r0:r0 + nb]).max()) for r0 in range(0, n, nb)), default=0.0)
+    else:
+        if scratch_path is None:
+            # Cạnh tệp của A (cùng ổ đĩa), không để trong /tmp có thể là tmpfs nằm trên RAM
+            source = getattr(A, "filename", None)
+            fd, scratch_file = tempfile.mkstemp(suffix=".npy", dir=os.path.dirname(source) if source else None)
+            os.close(fd)
+            scratch_path = scratch_file
+        W = np.lib.format.open_memmap(scratch_path, mode="w+", dtype=float, shape=(n, n))
+        scale = 0.0
+        for r0 in range(0, n, nb):
+            W[r0:r0 + nb] = A[r0:r0 + nb]
+            scale = max(scale, float(np.abs(W[r0:r0 + nb]).max()))
+    # Cùng ngưỡng như zero_tolerance, max|A| tính theo từng dải hàng
+    eps = np.finfo(float).eps
+    pivot_tol = n * eps * scale
+    rhs_tol = _rhs_tolerance(b)
+    # Cột cuối cùng chưa bị loại; các cột sau nó đã được đặt bằng 0
+    last = n - 1
+
+    try:
+        for k in range(0, n, nb):
+            e = min(k + nb, n)
+
+            # Khử panel k..e-1 trong bộ nhớ, vế phải cập nhật ngay; bỏ panel / U12 cũ trước khi đọc khối mới
+            panel = U12 = None
+            panel = np.array(W[k:, k:e], dtype=float)
+            for i in range(e - k):
+                g = k + i
+                # Cột phụ thuộc (trụ ~0): bỏ đi, đưa cột cuối chưa xét vào chỗ của nó
+                while np.abs(panel[i:, i]).max() <= pivot_tol:
+                    if last <= g:
+                        # Các cột còn lại đều bằng 0: có nghiệm khi vế phải các hàng còn lại bằng 0
+                        return "Vô nghiệm" if np.any(np.abs(b[g:]) > rhs_tol) else "Vô số nghiệm"
+                    if last < e:
+                        panel[:, i] = panel[:, last - k]
+                        panel[:, last - k] = 0.0
+                    else:
+                        # Cột ngoài panel mới nhận các phép đổi hàng: áp nốt các bước khử của panel
+                        column = np.array(W[k:, last], dtype=float)
+                        for j in range(i):
+                            column[j + 1:] -= panel[j + 1:, j] * column[j]
+                        panel[:, i] = column
+                        W[k:, last] = 0.0
+                    last -= 1
+
+                p = i + np.argmax(np.abs(panel[i:, i]))
+                if p != i:
+                    panel[[i, p]] = panel[[p, i]]
+                    b[[g, k + p]] = b[[k + p, g]]
+                    row_i = np.array(W[g, e:])
+                    W[g, e:] = W[k + p, e:]
+                    W[k + p, e:] = row_i
+
+                pivot = panel[i, i]
+                panel[i + 1:, i] /= pivot
+                panel[i + 1:, i + 1:] -= np.outer(panel[i + 1:, i], panel[i, i + 1:])
+                b[k + i + 1:] -= panel[i + 1:, i] * b[k + i]
+            W[k:, k:e] = panel
+
+            if e == n:
+                break
+
+            # U12 = L11^-1 * A12 cho các hàng của panel
+            U12 = np.array(W[k:e, e:], dtype=float)
+            for i in range(e - k):
+                U12[i + 1:] -= np.outer(panel[i + 1:e - k, i], U12[i])
+            W[k:e, e:] = U12
+
+            # Cập nhật phần còn lại theo từng dải hàng đọc từ đĩa
+            for r0 in range(e, n, nb):
+                r1 = min(r0 + nb, n)
+                W[r0:r1, e:] -= panel[r0 - k:r1 - k] @ U12
+
+        if isinstance(W, np.memmap):
+            W.flush()
+
+        # Thế ngược, đọc các dải hàng từ dưới lên
+        x = np.zeros(n)
+        for r1 in range(n, 0, -nb):
+            r0 = max(r1 - nb, 0)
+            tile = np.array(W[r0:r1, r0:], dtype=float)
+            for i in range(r1 - r0 - 1, -1, -1):
+                g = r0 + i
+                x[g] = (b[g] - tile[i, i + 1:] @ x[g + 1:]) / tile[i, i]
+        return x
+    finally:
+        del W
+        if scratch_file is not None:
+            os.remove(scratch_file)
 
 class LinearEquationSolver:
-    def __init__(self, A, b):
-        self.A = np.array(A)
+    def __init__(self, A, b, engine="classic", block_size=64, workers=None,
+                 memory_budget=256 * 2**20, scratch_path=None, in_place=False):
+        # Ma trận thưa (SparseMatrix hoặc scipy.sparse) được giữ nguyên dạng nén
+        if isinstance(A, SparseMatrix):
+            self.A = A
+            self.sparse = True
+        elif hasattr(A, "tocoo"):
+            self.A = SparseMatrix.from_scipy(A)
+            self.sparse = True
+        elif engine == "out_of_core":
+            # Giữ nguyên memmap / đường dẫn .npy, không chép A vào bộ nhớ
+            self.A = A
+            self.sparse = False
+        else:
+            self.A = np.array(A)
+            self.sparse = False
+        if isinstance(b, (str, os.PathLike)):
+            b = np.load(b)
         self.b = np.array(b)
         self.n = len(b)
+        self.lu = None
+        self.preconditioners = {}
+        self.last_info = None
+
+        # engine="blocked": khử Gauss theo khối trên nhiều luồng cho n lớn
+        self.engine = engine
+        self.block_size = block_size
+        self.workers = workers
+
+        # engine="out_of_core": A nằm trên đĩa, khử theo dải hàng trong memory_budget byte
+        self.memory_budget = memory_budget
+        self.scratch_path = scratch_path
+        self.in_place = in_place
 
     def gaussian_elimination(self):
+        if self.sparse:
+            # Ma trận thưa không khử Gauss được: giải lặp trên dạng nén
+            return self._iterative_or_raise(self.b)
+        if self.engine == "blocked":
+            return blocked_gaussian_elimination(self.A, self.b, self.block_size, self.workers)
+        if self.engine == "out_of_core":
+            return out_of_core_gaussian_elimination(self.A, self.b, self.memory_budget,
+                                                    self.scratch_path, self.in_place)
 
-        Ab = np.concatenate((self.A, self.b.reshape(-1, 1)), axis=1)
+        Ab = np.concatenate((self.A, self.b.reshape(-1, 1)), axis=1).astype(float)
+        tol = zero_tolerance(self.A)
 
         for i in range(self.n):
+            # Chọn trụ lớn nhất theo cột; trụ không vượt ngưỡng làm tròn coi như 0
+            k = i + np.argmax(np.abs(Ab[i:, i]))
+            if abs(Ab[k, i]) <= tol:
+                return singular_status(self.A, self.b)
+            if k != i:
+                Ab[[i, k]] = Ab[[k, i]]
             pivot = Ab[i, i]
 
-            if pivot == 0:
-                for k in range(i + 1, self.n):
-                    if Ab[k, i] != 0:
-                        Ab[[i, k]] = Ab[[k, i]]
-                        pivot = Ab[i, i]
-                        break
-
-                if pivot == 0:
-                    if Ab[i, self.n] != 0:
-                        return "Vô nghiệm"
-                    else:
-                        return "Vô số nghiệm"
-
             Ab[i, :] /= pivot
 
             for j in range(i + 1, self.n):
@@ -42,12 +626,374 @@ class LinearEquationSolver:
 
         return x
 
+    def lu_factorization(self):
+        """ Phân tích PA = LU (chọn phần tử trụ theo cột) và lưu lại các nhân tử. """
+        if self.sparse:
+            raise ValueError("Ma trận thưa không phân tích LU được, hãy dùng iterative_solve().")
+        LU = np.array(self.A, dtype=float)
+        perm = np.arange(self.n)
+        singular = False
+        tol = zero_tolerance(LU)
+
+        for i in range(self.n):
+            p = i + np.argmax(np.abs(LU[i:, i]))
+            if abs(LU[p, i]) <= tol:
+                singular = True
+                continue
+
+            if p != i:
+                LU[[i, p]] = LU[[p, i]]
+                perm[[i, p]] = perm[[p, i]]
+
+            # Cập nhật cả khối con còn lại bằng một phép tích ngoài
+            LU[i + 1:, i] /= LU[i, i]
+            LU[i + 1:, i + 1:] -= np.outer(LU[i + 1:, i], LU[i, i + 1:])
+
+        self.lu = LU
+        self.perm = perm
+        self.singular = singular
+        return LU, perm
+
+    def solve(self, b):
+        """ Giải Ax = b, dùng lại các nhân tử LU đã tính. """
+        return self.solve_many(np.asarray(b).reshape(1, -1))[0]
+
+    def solve_many(self, B):
+        """ Giải Ax = b cho từng hàng b của B, mỗi vế phải chỉ tốn O(n^2). """
+        B = np.atleast_2d(np.asarray(B, dtype=float))
+        if self.sparse:
+            return np.array([self._iterative_or_raise(b) for b in B])
+
+        if self.lu is None:
+            self.lu_factorization()
+
+        # Ma trận suy biến: kết luận vô nghiệm / vô số nghiệm tùy theo b
+        if self.singular:
+            return [singular_status(self.A, b) for b in B]
+
+        LU = self.lu
+        Y = B[:, self.perm].T.copy()
+
+        for i in range(1, self.n):
+            Y[i] -= LU[i, :i] @ Y[:i]
+
+        for i in range(self.n - 1, -1, -1):
+            Y[i] -= LU[i, i + 1:] @ Y[i + 1:]
+            Y[i] /= LU[i, i]
+
+        return Y.T
+
+    def _iterative_or_raise(self, b):
+        """ Giải lặp một vế phải; báo lỗi thay vì trả nghiệm khi không hội tụ. """
+        x, info = self.iterative_solve(b)
+        if not info["converged"]:
+            raise ValueError(f"Phương pháp {info['method']} không hội tụ sau {info['iterations']} bước "
+                             f"(sai số {info['residual']:.3g}); ma trận có thể suy biến.")
+        return x
+
+    def is_spd_candidate(self):
+        """ Kiểm tra nhanh: đối xứng và đường chéo dương (điều kiện cần cho CG). """
+        if self.sparse:
+            return self.A.is_symmetric() and np.all(self.A.diagonal() > 0)
+        A = np.asarray(self.A, dtype=float)
+        return np.allclose(A, A.T) and np.all(np.diag(A) > 0)
+
+    def _preconditioner(self, name):
+        """ Trả về (tên thực dùng, hàm M); nhân tử được giữ lại cho các lần giải sau. """
+        if name == "auto":
+            if "auto" not in self.preconditioners:
+                choices = ["ilu0", "jacobi"] if self.n <= ILU0_AUTO_MAX_N else ["jacobi"]
+                chosen = (None, lambda r: r)
+                for choice in choices:
+                    try:
+                        chosen = self._preconditioner(choice)
+                        break
+                    except ValueError:
+                        continue
+                self.preconditioners["auto"] = chosen
+            return self.preconditioners["auto"]
+        if name is None:
+            return None, lambda r: r
+        if name not in self.preconditioners:
+            self.preconditioners[name] = (name, PRECONDITIONERS[name](self.A))
+        return self.preconditioners[name]
+
+    def iterative_solve(self, b=None, method="auto", preconditioner="auto",
+                        tol=1e-8, maxiter=None, restart=30, x0=None):
+        """ Giải lặp Ax = b, trả về (x, info) với info mô tả quá trình hội tụ.
+
+        method: "auto" (CG nếu A đối xứng, đường chéo dương; ngược lại GMRES),
+        "cg", "gmres" hoặc "bicgstab". preconditioner: "auto" (ILU(0) khi n <= ILU0_AUTO_MAX_N
+        và phân tích được, ngược lại Jacobi), "jacobi", "ilu0" hoặc None.
+        """
+        b = np.asarray(self.b if b is None else b, dtype=float)
+        if method == "auto":
+            method = "cg" if self.is_spd_candidate() else "gmres"
+        if method not in ITERATIVE_METHODS:
+            raise ValueError(f"Phương pháp lặp không hợp lệ: {method}")
+        if maxiter is None:
+            maxiter = 10 * self.n
+
+        preconditioner, M = self._preconditioner(preconditioner)
+
+        x0 = np.zeros(self.n) if x0 is None else np.asarray(x0, dtype=float)
+        if method == "gmres":
+            x, history = gmres(self.A, b, M, x0, tol, maxiter, restart)
+        else:
+            x, history = ITERATIVE_METHODS[method](self.A, b, M, x0, tol, maxiter)
+
+        self.last_info = {
+            "method": method,
+            "preconditioner": preconditioner,
+            "converged": bool(history[-1] < tol),
+            "iterations": len(history) - 1,
+            "residual": float(history[-1]),
+            "history": history,
+        }
+        return x, self.last_info
+
+def batch_gaussian_elimination(A, b):
+    """ Giải đồng thời k hệ: A có dạng (k, n, n), b có dạng (k, n).
+
+    Trả về (x, status): x dạng (k, n) (NaN với hệ không có nghiệm duy nhất)
+    và status dạng (k,) gồm UNIQUE / NO_SOLUTION / INFINITE_SOLUTIONS.
+    """
+    A = np.asarray(A, dtype=float)
+    b = np.asarray(b, dtype=float)
+    k, n = b.shape
+
+    Ab = np.empty((k, n, n + 1))
+    Ab[:, :, :n] = A
+    Ab[:, :, n] = b
+
+    status = np.full(k, UNIQUE, dtype=np.int8)
+    systems = np.arange(k)
+    # Cùng ngưỡng như zero_tolerance, tính riêng cho từng hệ
+    eps = np.finfo(float).eps
+    pivot_tol = n * eps * (np.abs(A).max(axis=(1, 2)) if n else np.zeros(k))
+    singular = np.zeros(k, dtype=bool)
+
+    for i in range(n):
+        # Đổi hàng i với hàng có phần tử trụ lớn nhất, cho mọi hệ cùng lúc
+        p = i + np.argmax(np.abs(Ab[:, i:, i]), axis=1)
+        row_p = Ab[systems, p].copy()
+        Ab[systems, p] = Ab[:, i]
+        Ab[:, i] = row_p
+
+        pivot = Ab[:, i, i]
+        singular |= np.abs(pivot) <= pivot_tol
+
+        # Các hệ suy biến vẫn đi tiếp để giữ dạng mảng (trụ giả, không khử nữa), kết luận riêng ở cuối
+        pivot = np.where(singular, 1.0, pivot)
+        Ab[:, i] /= pivot[:, None]
+        factor = np.where(singular[:, None, None], 0.0, Ab[:, i + 1:, i:i + 1])
+        Ab[:, i + 1:] -= factor * Ab[:, i:i + 1, :]
+
+    x = np.zeros((k, n))
+    for i in range(n - 1, -1, -1):
+        x[:, i] = Ab[:, i, n] - np.einsum("kj,kj->k", Ab[:, i, i + 1:n], x[:, i + 1:])
+
+    # Hệ suy biến: so hạng A và [A|b] như gaussian_elimination (số hệ này thường ít)
+    for s in np.flatnonzero(singular):
+        status[s] = NO_SOLUTION if singular_status(A[s], b[s]) == "Vô nghiệm" else INFINITE_SOLUTIONS
+
+    x[status != UNIQUE] = np.nan
+    return x, status
+
+class MatrixGrid(ttk.Frame):
+    """ Lưới nhập hệ số kiểu bảng tính: chỉ vẽ các ô đang hiển thị, dữ liệu nằm trong mảng NumPy. """
+
+    CELL_W, CELL_H = 70, 24
+    HEADER_W, HEADER_H = 44, 24
+
+    def __init__(self, master, n, data=None):
+        super().__init__(master)
+        self.n = n
+        # Cột cuối là vector b
+        self.data = np.zeros((n, n + 1)) if data is None else np.array(data, dtype=float)
+        self.selected = (0, 0)
+        self.editor = None
+
+        self.canvas = tk.Canvas(self, width=540, height=260, background="white",
+                                highlightthickness=0, takefocus=True)
+        x_scroll = ttk.Scrollbar(self, orient="horizontal", command=self.xview)
+        y_scroll = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.canvas.configure(
+            xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set,
+            scrollregion=(0, 0, self.HEADER_W + (n + 1) * self.CELL_W, self.HEADER_H + n * self.CELL_H))
+
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        x_scroll.grid(row=1, column=0, sticky="ew")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.bind_wheel(self.canvas)
+        self.canvas.bind("<Control-v>", lambda event: self.paste())
+
+    def bind_wheel(self, widget):
+        """ Cuộn dọc bằng con lăn: <MouseWheel> trên Windows / macOS, <Button-4>/<Button-5> trên X11. """
+        widget.bind("<MouseWheel>", self.on_wheel)
+        widget.bind("<Button-4>", lambda event: self.yview("scroll", -1, "units"))
+        widget.bind("<Button-5>", lambda event: self.yview("scroll", 1, "units"))
+
+    def on_wheel(self, event):
+        # delta là bội của 120 trên Windows nhưng chỉ ±1, ±2... trên macOS / bàn di chuột:
+        # -event.delta // 120 làm tròn xuống nên cuộn lên một nấc nhỏ lại thành cuộn xuống
+        steps = -int(event.delta / 120) or -int(np.sign(event.delta))
+        if steps:
+            self.yview("scroll", steps, "units")
+
+    def xview(self, *args):
+        self.commit_edit()
+        self.canvas.xview(*args)
+        self.redraw()
+
+    def yview(self, *args):
+        self.commit_edit()
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def cell_at(self, x, y):
+        """ Ô (hàng, cột) tại tọa độ canvas, hoặc None nếu rơi vào tiêu đề / ngoài bảng. """
+        i = int((y - self.HEADER_H) // self.CELL_H)
+        j = int((x - self.HEADER_W) // self.CELL_W)
+        if x < self.HEADER_W or y < self.HEADER_H or i >= self.n or j > self.n:
+            return None
+        return i, j
+
+    def redraw(self):
+        """ Vẽ lại chỉ các ô nằm trong vùng nhìn thấy. """
+        c = self.canvas
+        c.delete("cell")
+        left, top = c.canvasx(0), c.canvasy(0)
+        width, height = c.winfo_width(), c.winfo_height()
+
+        j0 = max(0, int((left - self.HEADER_W) // self.CELL_W))
+        j1 = min(self.n + 1, int((left + width - self.HEADER_W) // self.CELL_W) + 1)
+        i0 = max(0, int((top - self.HEADER_H) // self.CELL_H))
+        i1 = min(self.n, int((top + height - self.HEADER_H) // self.CELL_H) + 1)
+
+        for i in range(i0, i1):
+            y = self.HEADER_H + i * self.CELL_H
+            for j in range(j0, j1):
+                x = self.HEADER_W + j * self.CELL_W
+                fill = "#cce5ff" if (i, j) == self.selected else ("#f4f4f4" if j == self.n else "white")
+                c.create_rectangle(x, y, x + self.CELL_W, y + self.CELL_H, fill=fill, outline="#d0d0d0", tags="cell")
+                c.create_text(x + self.CELL_W - 4, y + self.CELL_H / 2, anchor="e",
+                              text=f"{self.data[i, j]:g}", tags="cell")
+
+        # Tiêu đề hàng / cột luôn bám theo mép vùng nhìn thấy
+        for j in range(j0, j1):
+            x = self.HEADER_W + j * self.CELL_W
+            c.create_rectangle(x, top, x + self.CELL_W, top + self.HEADER_H, fill="#e8e8e8", outline="#b0b0b0", tags="cell")
+            c.create_text(x + self.CELL_W / 2, top + self.HEADER_H / 2,
+                          text="b" if j == self.n else f"a·{j + 1}", tags="cell")
+        for i in range(i0, i1):
+            y = self.HEADER_H + i * self.CELL_H
+            c.create_rectangle(left, y, left + self.HEADER_W, y + self.CELL_H, fill="#e8e8e8", outline="#b0b0b0", tags="cell")
+            c.create_text(left + self.HEADER_W / 2, y + self.CELL_H / 2, text=f"{i + 1}", tags="cell")
+        c.create_rectangle(left, top, left + self.HEADER_W, top + self.HEADER_H, fill="#e8e8e8", outline="#b0b0b0", tags="cell")
+
+    def on_click(self, event):
+        """ Chọn ô và mở một Entry duy nhất để sửa ô đó. """
+        self.commit_edit()
+        self.canvas.focus_set()
+        cell = self.cell_at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        if cell is None:
+            return
+        self.selected = cell
+        self.redraw()
+        self.start_edit(*cell)
+
+    def start_edit(self, i, j):
+        entry = ttk.Entry(self.canvas, width=8, justify="right")
+        entry.insert(0, f"{self.data[i, j]:g}")
+        entry.select_range(0, tk.END)
+        window = self.canvas.create_window(self.HEADER_W + j * self.CELL_W, self.HEADER_H + i * self.CELL_H,
+                                           anchor="nw", window=entry,
+                                           width=self.CELL_W, height=self.CELL_H)
+        entry.bind("<Return>", lambda event: self.move_edit(1, 0))
+        entry.bind("<Tab>", lambda event: self.move_edit(0, 1) or "break")
+        entry.bind("<Escape>", lambda event: self.cancel_edit())
+        entry.bind("<Control-v>", lambda event: self.paste() or "break")
+        self.bind_wheel(entry)
+        entry.focus_set()
+        self.editor = (entry, window, i, j)
+
+    def commit_edit(self):
+        if self.editor is None:
+            return
+        entry, window, i, j = self.editor
+        text = entry.get().strip()
+        self.cancel_edit()
+        try:
+            self.data[i, j] = float(text) if text else 0.0
+        except ValueError:
+            messagebox.showerror("Lỗi", f"Giá trị không hợp lệ ở ô ({i + 1}, {j + 1}): {text}")
+
+    def cancel_edit(self):
+        if self.editor is None:
+            return
+        entry, window, _, _ = self.editor
+        self.editor = None
+        self.canvas.delete(window)
+        entry.destroy()
+        self.canvas.focus_set()
+
+    def move_edit(self, di, dj):
+        """ Ghi ô đang sửa rồi chuyển sang ô kế tiếp (Enter: xuống, Tab: sang phải). """
+        self.commit_edit()
+        i, j = self.selected
+        i, j = min(i + di, self.n - 1), min(j + dj, self.n)
+        self.selected = (i, j)
+        self.redraw()
+        self.start_edit(i, j)
+
+    def paste(self):
+        """ Dán một khối số từ clipboard (phân tách bằng tab, dấu phẩy hoặc khoảng trắng) tại ô đang chọn. """
+        self.cancel_edit()
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            return
+        rows = [line.replace(",", " ").split() for line in text.splitlines() if line.strip()]
+        try:
+            block = np.array(rows, dtype=float)
+        except ValueError:
+            messagebox.showerror("Lỗi", "Dữ liệu dán phải là một bảng số có cùng số cột trên mỗi dòng.")
+            return
+        block = np.atleast_2d(block)
+        i, j = self.selected
+        h, w = min(block.shape[0], self.n - i), min(block.shape[1], self.n + 1 - j)
+        self.data[i:i + h, j:j + w] = block[:h, :w]
+        self.redraw()
+
+
+def load_augmented_matrix(path):
+    """ Đọc ma trận mở rộng [A | b] từ .npy hoặc CSV; chấp nhận cả (n, n) (b = 0). """
+    if path.lower().endswith(".npy"):
+        data = np.load(path)
+    else:
+        data = np.loadtxt(path, delimiter=",", ndmin=2)
+    data = np.asarray(data, dtype=float)
+    n = data.shape[0]
+    if data.shape == (n, n):
+        data = np.hstack([data, np.zeros((n, 1))])
+    if data.shape != (n, n + 1):
+        raise ValueError(f"Ma trận phải có dạng (n, n+1) hoặc (n, n), nhận được {data.shape}.")
+    return data
+
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Giải hệ phương trình tuyến tính")
-        self.geometry("600x450")
+        self.geometry("640x620")
 
+        self.matrix_grid = None
         self.create_widgets()
 
     def create_widgets(self):
@@ -58,21 +1004,17 @@ class App(tk.Tk):
         self.entry_n = ttk.Entry(self.frame_n, width=5)
         self.entry_n.pack(side="left")
 
-        # Nút tạo ma trận và vector
-        self.btn_create = ttk.Button(self, text="Tạo", command=self.create_matrix_vector)
-        self.btn_create.pack(pady=10)
+        # Nút tạo ma trận và nút nhập từ tệp
+        self.frame_buttons = ttk.Frame(self)
+        self.frame_buttons.pack(pady=10)
+        self.btn_create = ttk.Button(self.frame_buttons, text="Tạo", command=self.create_matrix_vector)
+        self.btn_create.pack(side="left", padx=5)
+        self.btn_import = ttk.Button(self.frame_buttons, text="Nhập từ tệp", command=self.import_matrix)
+        self.btn_import.pack(side="left", padx=5)
 
-        # Khung chứa ma trận, vector và label hệ số
+        # Khung chứa lưới hệ số [A | b]
         self.frame_matrix_vector = ttk.Frame(self)
-        self.frame_matrix_vector.pack()
-
-        # Khung chứa ma trận A
-        self.frame_matrix = ttk.Frame(self.frame_matrix_vector)
-        self.frame_matrix.pack(side="left", padx=10)
-
-        # Khung chứa vector b
-        self.frame_vector = ttk.Frame(self.frame_matrix_vector)
-        self.frame_vector.pack(side="left", padx=10)
+        self.frame_matrix_vector.pack(fill="both", expand=True, padx=10)
 
         # Nút giải hệ phương trình
         self.btn_solve = ttk.Button(self, text="Giải", command=self.solve, state="disabled")
@@ -81,94 +1023,257 @@ class App(tk.Tk):
         # Khung hiển thị kết quả
         self.frame_result = ttk.Frame(self)
         self.frame_result.pack()
+        self.result_text = tk.Text(self.frame_result, wrap="none", height=6, width=40, state="disabled")
+        result_scroll = ttk.Scrollbar(self.frame_result, orient="vertical", command=self.result_text.yview)
+        self.result_text.configure(yscrollcommand=result_scroll.set)
+        self.result_text.pack(side="left")
+        result_scroll.pack(side="left", fill="y")
 
         # Ô hướng dẫn sử dụng
-        self.instructions = tk.Text(self, wrap="word", height=5)
+        self.instructions = tk.Text(self, wrap="word", height=6)
         self.instructions.pack(pady=10)
         self.instructions.insert(tk.END, "Hướng dẫn sử dụng:\n"
                                           "1. Nhập số phương trình.\n"
-                                          "2. Nhấn nút 'Tạo' để hiển thị ra các ô nhập hệ số.\n"
-                                          "3. Nhập các hệ số .\n"
+                                          "2. Nhấn nút 'Tạo' để hiển thị bảng hệ số, hoặc 'Nhập từ tệp' (CSV / .npy).\n"
+                                          "3. Nhấn vào một ô để nhập hệ số (Enter: xuống, Tab: sang phải),\n"
+                                          "   hoặc Ctrl+V để dán cả khối số.\n"
                                           "4. Nhấn nút 'Giải' để xem kết quả.")
         self.instructions.config(state="disabled")
 
+    def show_grid(self, n, data=None):
+        """ Thay lưới cũ bằng lưới mới cỡ n x (n + 1). """
+        if self.matrix_grid is not None:
+            self.matrix_grid.destroy()
+        self.matrix_grid = MatrixGrid(self.frame_matrix_vector, n, data)
+        self.matrix_grid.pack(fill="both", expand=True)
+
+        # Kích hoạt nút giải hệ phương trình
+        self.btn_solve.config(state="normal")
+
     def create_matrix_vector(self):
-        """ Tạo ma trận A, vector b và các label hệ số. """
+        """ Tạo lưới nhập ma trận A và vector b. """
         try:
             n = int(self.entry_n.get())
         except ValueError:
             messagebox.showerror("Lỗi", "Vui lòng nhập số nguyên cho số phương trình.")
             return
+        if n <= 0:
+            messagebox.showerror("Lỗi", "Số phương trình phải lớn hơn 0.")
+            return
 
-        # Xóa các widget cũ
-        for widget in self.frame_matrix.winfo_children():
-            widget.destroy()
-        for widget in self.frame_vector.winfo_children():
-            widget.destroy()
-
-        # Tạo các entry cho ma trận A và label hệ số phía trên
-        self.entries_A = []
-        for i in range(n):
-            row = []
-            for j in range(n):
-                # Tạo frame để chứa label và entry
-                frame = ttk.Frame(self.frame_matrix)
-                frame.grid(row=i, column=j, padx=2, pady=2)
-
-                # Tạo label hệ số
-                label = ttk.Label(frame, text=f"a{i+1}{j+1}")
-                label.pack()
-
-                entry = ttk.Entry(frame, width=5)
-                entry.pack()
-                row.append(entry)
-            self.entries_A.append(row)
-
-        # Tạo các entry cho vector b và label hệ số phía trên
-        self.entries_b = []
-        for i in range(n):
-            # Tạo frame để chứa label và entry
-            frame = ttk.Frame(self.frame_vector)
-            frame.grid(row=i, column=0, padx=2, pady=2)
-
-            # Tạo label hệ số
-            label = ttk.Label(frame, text=f"b{i+1}")
-            label.pack()
-
-            entry = ttk.Entry(frame, width=5)
-            entry.pack()
-            self.entries_b.append(entry)
+        self.show_grid(n)
 
-        # Kích hoạt nút giải hệ phương trình
-        self.btn_solve.config(state="normal")
-
-    def solve(self):
-        """ Giải hệ phương trình và hiển thị kết quả. """
+    def import_matrix(self):
+        """ Nạp ma trận mở rộng [A | b] từ tệp CSV hoặc .npy. """
+        path = filedialog.askopenfilename(
+            title="Chọn tệp ma trận",
+            filetypes=(("CSV / NumPy", "*.csv *.npy"), ("All files", "*.*")),
+        )
+        if not path:
+            return
         try:
-            n = int(self.entry_n.get())
+            data = load_augmented_matrix(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Lỗi", f"Không đọc được tệp. {e}")
+            return
 
-            A = [[float(self.entries_A[i][j].get()) for j in range(n)] for i in range(n)]
-            b = [float(self.entries_b[i].get()) for i in range(n)]
+        self.entry_n.delete(0, tk.END)
+        self.entry_n.insert(0, str(data.shape[0]))
+        self.show_grid(data.shape[0], data)
 
-            solver = LinearEquationSolver(A, b)
-            solution = solver.gaussian_elimination()
+    def solve(self):
+        """ Giải hệ phương trình và hiển thị kết quả. """
+        self.matrix_grid.commit_edit()
+        n = self.matrix_grid.n
+        A = self.matrix_grid.data[:, :n]
+        b = self.matrix_grid.data[:, n]
 
-            self.show_result(solution)
+        solver = LinearEquationSolver(A, b)
+        solution = solver.solve(b)
 
-        except ValueError:
-            messagebox.showerror("Lỗi", "Vui lòng nhập số cho tất cả các ô.")
+        self.show_result(solution)
 
     def show_result(self, solution):
         """ Hiển thị nghiệm của hệ phương trình. """
-        for widget in self.frame_result.winfo_children():
-            widget.destroy()
-
         if isinstance(solution, str):
-            ttk.Label(self.frame_result, text=solution).pack()
+            text = solution
         else:
-            for i, value in enumerate(solution):
-                ttk.Label(self.frame_result, text=f"x{i + 1} = {value:.2f}").pack()
+            text = "\n".join(f"x{i + 1} = {value:.2f}" for i, value in enumerate(solution))
+
+        self.result_text.config(state="normal")
+        self.result_text.delete("1.0", tk.END)
+        self.result_text.insert(tk.END, text)
+        self.result_text.config(state="disabled")
+
+
+def _npz_rows(archive, name):
+    """ Đọc lần lượt từng phần tử theo trục đầu của mảng name trong tệp .npz.
+
+    Chỉ giải nén phần đang đọc (kể cả với np.savez_compressed), không nạp cả mảng.
+    """
+    with archive.open(name + ".npy") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        if fortran_order or dtype.hasobject:
+            # Không đọc tuần tự theo hàng được: nạp cả mảng
+            f.seek(0)
+            yield from np.lib.format.read_array(f)
+            return
+        item_shape = shape[1:]
+        nbytes = dtype.itemsize * int(np.prod(item_shape))
+        for _ in range(shape[0]):
+            yield np.frombuffer(f.read(nbytes), dtype=dtype).reshape(item_shape)
+
+
+def read_systems(path, fmt=None):
+    """ Đọc lần lượt từng hệ (A, b) từ tệp JSONL / CSV / NPZ hoặc stdin ("-").
+
+    JSONL: mỗi dòng {"A": [[...]], "b": [...]}.
+    CSV: mỗi dòng gồm n*n hệ số của A (theo hàng) rồi n hệ số của b.
+    NPZ: hai mảng "A" dạng (k, n, n) và "b" dạng (k, n), đọc từng hệ một.
+    Dòng JSONL / CSV hỏng cho một ValueError thay cho (A, b), để chỉ hệ đó bị báo lỗi.
+    """
+    if fmt is None:
+        fmt = "jsonl" if path == "-" else os.path.splitext(path)[1].lstrip(".").lower()
+        fmt = "jsonl" if fmt == "json" else fmt
+
+    if fmt == "npz":
+        with zipfile.ZipFile(path) as archive:
+            yield from zip(_npz_rows(archive, "A"), _npz_rows(archive, "b"))
+        return
+
+    stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if fmt == "jsonl":
+            for number, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    system = json.loads(line)
+                    yield system["A"], system["b"]
+                except (json.JSONDecodeError, KeyError, TypeError) as e:
+                    yield ValueError(f"Dòng {number} không phải một hệ {{\"A\": ..., \"b\": ...}}: {e!r}")
+        elif fmt == "csv":
+            for number, row in enumerate(csv.reader(stream), 1):
+                if not row:
+                    continue
+                try:
+                    values = np.array(row, dtype=float)
+                except ValueError as e:
+                    yield ValueError(f"Dòng CSV {number}: {e}")
+                    continue
+                n = int(round((np.sqrt(1 + 4 * len(values)) - 1) / 2))
+                if n * n + n != len(values):
+                    yield ValueError(f"Dòng CSV {number} có {len(values)} số, không phải n*n + n.")
+                    continue
+                yield values[:n * n].reshape(n, n), values[n * n:]
+        else:
+            raise ValueError(f"Định dạng không hỗ trợ: {fmt}")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _solve_chunk(chunk):
+    """ Chạy trong tiến trình con: giải một nhóm hệ (chỉ số, (A, b) hoặc lỗi đọc).
+
+    Hệ hỏng cho kết quả là ValueError, các hệ khác trong nhóm vẫn được giải.
+    """
+    results = []
+    for index, system in chunk:
+        if isinstance(system, Exception):
+            results.append((index, system))
+            continue
+        try:
+            A = np.asarray(system[0], dtype=float)
+            b = np.asarray(system[1], dtype=float)
+            if b.ndim != 1 or A.shape != (len(b), len(b)):
+                raise ValueError(f"A phải có dạng (n, n) và b dạng (n,), nhận được {A.shape} và {b.shape}.")
+            results.append((index, LinearEquationSolver(A, b).gaussian_elimination()))
+        except (ValueError, TypeError) as e:
+            results.append((index, ValueError(str(e))))
+    return results
+
+
+def solve_stream(systems, workers=None, chunk_size=64, ordered=True, max_in_flight=None):
+    """ Giải song song một dòng hệ phương trình, trả về dần (chỉ số, kết quả).
+
+    Hệ hỏng (hoặc lỗi đọc từ read_systems) có kết quả là một ValueError.
+
+    Chỉ giữ tối đa max_in_flight nhóm đang xử lý nên bộ nhớ bị chặn trên,
+    bất kể dòng vào dài bao nhiêu.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    numbered = enumerate(systems)
+    chunks = iter(lambda: list(islice(numbered, chunk_size)), [])
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def next_finished():
+            if ordered:
+                return pending.popleft().result()
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            future = done.pop()
+            pending.remove(future)
+            return future.result()
+
+        for chunk in chunks:
+            pending.append(pool.submit(_solve_chunk, chunk))
+            if len(pending) >= max_in_flight:
+                yield from next_finished()
+        while pending:
+            yield from next_finished()
+
+
+def format_result(index, result):
+    if isinstance(result, Exception):
+        return json.dumps({"index": index, "status": "error", "error": str(result)}, ensure_ascii=False)
+    if isinstance(result, str):
+        return json.dumps({"index": index, "status": result}, ensure_ascii=False)
+    # NaN / Infinity không hợp lệ trong JSON: ghi null
+    x = [float(v) if np.isfinite(v) else None for v in result]
+    return json.dumps({"index": index, "status": STATUS_TEXT[UNIQUE], "x": x},
+                      ensure_ascii=False, allow_nan=False)
+
+
+def main(argv=None):
+    """ Chế độ dòng lệnh: giải hàng loạt hệ phương trình, không cần giao diện. """
+    parser = argparse.ArgumentParser(description="Giải hàng loạt hệ phương trình tuyến tính.")
+    parser.add_argument("input", help="Tệp .jsonl / .csv / .npz, hoặc '-' để đọc stdin")
+    parser.add_argument("-o", "--output", default="-", help="Tệp kết quả JSONL (mặc định stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv", "npz"], help="Định dạng đầu vào")
+    parser.add_argument("--workers", type=int, default=None, help="Số tiến trình")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Số hệ mỗi lần gửi cho tiến trình")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Số nhóm tối đa đang xử lý")
+    parser.add_argument("--unordered", action="store_true", help="Ghi kết quả ngay khi xong, không giữ thứ tự")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    count = errors = 0
+    try:
+        systems = read_systems(args.input, args.format)
+        for index, result in solve_stream(systems, args.workers, args.chunk_size,
+                                          not args.unordered, args.max_in_flight):
+            out.write(format_result(index, result) + "\n")
+            count += 1
+            errors += isinstance(result, Exception)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Đã giải {count} hệ trong {elapsed:.2f} s ({count / max(elapsed, 1e-9):.0f} hệ/s, lỗi {errors})",
+          file=sys.stderr)
+    return 1 if errors else 0
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
     app = App()
     app.mainloop()
\ No newline at end of file
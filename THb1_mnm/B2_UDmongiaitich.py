@@ -1,85 +1,1333 @@
+import time
+
+# Mốc thời gian bắt đầu nạp module, dùng cho chế độ đo khởi động (--startup-time)
+_START = time.perf_counter()
+
+import argparse
+import cProfile
+import hashlib
+import importlib
+import json
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import pickle
+import pstats
+import re
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+
 import tkinter as tk
-from tkinter import ttk, messagebox
-import sympy as sp
+from tkinter import ttk, messagebox, filedialog
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+class _LazyModule:
+    """ Module chỉ được nạp ở lần truy cập thuộc tính đầu tiên.
+
+    SymPy và Matplotlib mất hơn một giây để nạp; trì hoãn chúng để cửa sổ hiện ngay.
+    """
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        value = getattr(importlib.import_module(self._name), attr)
+        setattr(self, attr, value)  # Lần sau lấy thẳng từ __dict__, không qua __getattr__
+        return value
+
+sp = _LazyModule("sympy")
+plt = _LazyModule("matplotlib.pyplot")
+
+def normalize_expression(expression):
+    """ Bỏ khoảng trắng không mang nghĩa ("x + 1" -> "x+1"); giữ một dấu cách giữa hai từ / số liền nhau.
+
+    Dùng chung cho khóa lưu đệm của parse_expression và khóa giao việc của MathJobRunner.
+    """
+    expression = expression.strip()
+
+    def keep(match):
+        before, after = expression[match.start() - 1], expression[match.end()]
+        return " " if (before.isalnum() or before == "_") and (after.isalnum() or after == "_") else ""
+
+    return re.sub(r"\s+", keep, expression)
+
+def parse_expression(expression):
+    """ sympify một lần cho mỗi chuỗi (đã chuẩn hóa); trả về (biểu thức, srepr chuẩn hóa dùng làm khóa). """
+    return _parse_normalized(normalize_expression(expression))
+
+@lru_cache(maxsize=1024)
+def _parse_normalized(expression):
+    f = sp.sympify(expression)
+    return f, sp.srepr(f)
+
+# Giữ giao diện của hàm có lru_cache (cache_clear / cache_info) cho nơi gọi bên ngoài
+parse_expression.cache_clear = _parse_normalized.cache_clear
+parse_expression.cache_info = _parse_normalized.cache_info
+
+def evaluate_function(func, *args):
+    """ Tính hàm đã lambdify trên mảng: luôn trả mảng số thực, giá trị phức / lỗi miền thành NaN. """
+    shape = np.broadcast(*args).shape
+    with np.errstate(all="ignore"):
+        values = np.asarray(func(*args))
+    values = np.broadcast_to(values, shape)
+    if np.iscomplexobj(values):
+        values = np.where(np.abs(values.imag) < 1e-12, values.real, np.nan)
+    return np.array(values, dtype=float)
+
+def weighted_percentile(x, y, q):
+    """ Phân vị của y có trọng số theo độ dài đoạn x quanh mỗi điểm.
+
+    Mẫu thích nghi dồn nhiều điểm về gần các cực; tính theo trọng số thì kết quả
+    như khi lấy mẫu đều.
+    """
+    widths = np.diff(x)
+    weights = np.concatenate(([widths[0] / 2], (widths[:-1] + widths[1:]) / 2, [widths[-1] / 2]))
+    finite = np.isfinite(y)
+    if not finite.any():
+        return np.zeros(len(np.atleast_1d(q)))
+    order = np.argsort(y[finite])
+    values, weights = y[finite][order], weights[finite][order]
+    cumulative = np.cumsum(weights) - weights / 2
+    return np.interp(np.asarray(q) / 100, cumulative / weights.sum(), values)
+
+def _robust_scale(x, y):
+    """ Biên độ "điển hình" của các giá trị hữu hạn, không bị các cực (pole) làm lệch. """
+    low, high = weighted_percentile(x, y, [5, 95])
+    if high > low:
+        return high - low
+    finite = np.abs(y[np.isfinite(y)])
+    return finite.max() if len(finite) and finite.max() > 0 else 1.0
+
+def adaptive_sample(func, x_range, max_points=2000, initial_points=101, tol=2e-3, max_depth=14):
+    """ Lấy mẫu thích nghi cho đồ thị 2D.
+
+    Chia đôi dần các đoạn có độ cong lớn (điểm lệch khỏi nội suy tuyến tính của
+    hai điểm kề) hoặc nằm ở biên miền xác định (một đầu hữu hạn, một đầu không),
+    cho đến khi đủ mịn hoặc hết max_points điểm. Chỗ đổi dấu với bước nhảy rất
+    lớn được coi là cực và chèn NaN để không vẽ đường thẳng đứng.
+    """
+    a, b = x_range
+    x = np.linspace(a, b, initial_points)
+    y = evaluate_function(func, x)
+    min_width = (b - a) / (initial_points - 1) / 2**max_depth
+
+    while len(x) < max_points:
+        scale = _robust_scale(x, y)
+        finite = np.isfinite(y)
+
+        deviation = np.zeros(len(x))
+        with np.errstate(all="ignore"):
+            t = (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+            deviation[1:-1] = np.abs(y[1:-1] - (y[:-2] + t * (y[2:] - y[:-2]))) / scale
+        deviation[~np.isfinite(deviation)] = 0.0
+
+        score = np.maximum(deviation[:-1], deviation[1:])
+        score[finite[:-1] != finite[1:]] = np.inf
+
+        candidates = np.nonzero((score > tol) & (np.diff(x) > min_width))[0]
+        if len(candidates) == 0:
+            break
+        budget = max_points - len(x)
+        if len(candidates) > budget:
+            candidates = np.sort(candidates[np.argsort(score[candidates])[::-1][:budget]])
+
+        x_mid = (x[candidates] + x[candidates + 1]) / 2
+        y_mid = evaluate_function(func, x_mid)
+        x = np.insert(x, candidates + 1, x_mid)
+        y = np.insert(y, candidates + 1, y_mid)
+
+    # Chèn NaN ở chỗ đổi dấu với bước nhảy rất lớn (qua cực), thay cho đường thẳng đứng
+    jumps = np.nonzero((y[:-1] * y[1:] < 0) & (np.abs(np.diff(y)) > 3 * _robust_scale(x, y)))[0]
+    if len(jumps):
+        x = np.insert(x, jumps + 1, (x[jumps] + x[jumps + 1]) / 2)
+        y = np.insert(y, jumps + 1, np.nan)
+    return x, y
+
+def evaluate_in_chunks(func, x, y, dtype=np.float32, memory_budget=64 * 2**20):
+    """ Tính func(x, y) trên các mảng điểm phẳng theo từng khúc; mảng tạm không vượt memory_budget byte. """
+    z = np.empty(len(x), dtype=dtype)
+    # Mỗi điểm tốn cỡ vài mảng float64 tạm trong lúc tính biểu thức
+    chunk = max(1024, memory_budget // (8 * 8))
+    for start in range(0, len(x), chunk):
+        stop = start + chunk
+        z[start:stop] = evaluate_function(func, np.asarray(x[start:stop], dtype=float),
+                                          np.asarray(y[start:stop], dtype=float))
+    return z
+
+def lod_surface(func, x_range, y_range, target_triangles=20000, dtype=np.float32,
+                memory_budget=64 * 2**20, refine_share=0.5, subdivisions=4, tol=1e-3):
+    """ Lưới mặt 3D nhiều mức chi tiết, số tam giác xấp xỉ target_triangles.
+
+    Lưới thô đều dùng khoảng (1 - refine_share) số tam giác. Phần còn lại dành để
+    chia nhỏ (subdivisions x subdivisions) các ô có sai số lớn nhất, đo bằng độ
+    lệch giữa giá trị ở tâm ô và trung bình bốn góc. Sau đó tam giác hóa Delaunay
+    toàn bộ các điểm. Bộ nhớ tỉ lệ với target_triangles, không phụ thuộc độ rộng
+    miền vẽ. Trả về (x, y, z, triangles).
+    """
+    from matplotlib.tri import Triangulation
+
+    (x0, x1), (y0, y1) = map(float, x_range), map(float, y_range)
+    if not (np.isfinite([x0, x1, y0, y1]).all() and x0 < x1 and y0 < y1):
+        raise ValueError("Miền vẽ phải hữu hạn và có cận dưới nhỏ hơn cận trên theo cả x và y.")
+    base_points = max(4, int(target_triangles * (1 - refine_share) / 2))
+    # Giới hạn nx trong [2, base_points // 2] để ny >= 2 và nx * ny <= base_points
+    # kể cả khi tỉ lệ hai cạnh rất lệch
+    nx = int(np.clip(np.sqrt(base_points * (x1 - x0) / (y1 - y0)), 2, base_points // 2))
+    ny = base_points // nx
+    gx = np.linspace(x0, x1, nx)
+    gy = np.linspace(y0, y1, ny)
+
+    X, Y = np.meshgrid(gx, gy, indexing="ij")
+    Z = evaluate_in_chunks(func, X.ravel(), Y.ravel(), dtype, memory_budget).reshape(nx, ny)
+
+    # Sai số mỗi ô: giá trị tại tâm so với trung bình bốn góc
+    CX, CY = np.meshgrid((gx[:-1] + gx[1:]) / 2, (gy[:-1] + gy[1:]) / 2, indexing="ij")
+    Zc = evaluate_in_chunks(func, CX.ravel(), CY.ravel(), dtype, memory_budget).reshape(nx - 1, ny - 1)
+    corners = (Z[:-1, :-1] + Z[1:, :-1] + Z[:-1, 1:] + Z[1:, 1:]) / 4
+    finite = Z[np.isfinite(Z)]
+    scale = np.ptp(np.percentile(finite, [5, 95])) if len(finite) else 1.0
+    with np.errstate(invalid="ignore"):
+        error = np.abs(Zc - corners) / (scale or 1.0)
+    error[np.isfinite(Zc) != np.isfinite(corners)] = np.inf
+    error[~np.isfinite(Zc) & ~np.isfinite(corners)] = 0.0
+
+    # Chọn các ô sai số lớn nhất trong phạm vi số điểm còn lại
+    frac = np.linspace(0, 1, subdivisions + 1)
+    FX, FY = np.meshgrid(frac, frac, indexing="ij")
+    inner = ~(np.isin(FX, (0, 1)) & np.isin(FY, (0, 1)))
+    FX, FY = FX[inner], FY[inner]
+    n_cells = int(target_triangles * refine_share / 2 // len(FX))
+    flat_error = error.ravel()
+    cells = np.argsort(flat_error)[::-1][:n_cells]
+    cells = cells[flat_error[cells] > tol]
+    ci, cj = np.unravel_index(cells, error.shape)
+
+    px = (gx[ci, None] + FX[None, :] * (gx[ci + 1] - gx[ci])[:, None]).ravel()
+    py = (gy[cj, None] + FY[None, :] * (gy[cj + 1] - gy[cj])[:, None]).ravel()
+    extra = np.unique(np.column_stack([px, py]), axis=0)
+    pz = evaluate_in_chunks(func, extra[:, 0], extra[:, 1], dtype, memory_budget)
+
+    x = np.concatenate([X.ravel(), extra[:, 0]]).astype(dtype)
+    y = np.concatenate([Y.ravel(), extra[:, 1]]).astype(dtype)
+    z = np.concatenate([Z.ravel(), pz])
+    keep = np.isfinite(z)
+    x, y, z = x[keep], y[keep], z[keep]
+
+    # Bỏ các tam giác bắc cầu qua vùng hàm không xác định
+    tri = Triangulation(x, y)
+    diag = np.hypot(gx[1] - gx[0], gy[1] - gy[0])
+    t = tri.triangles
+    edges = np.stack([np.hypot(x[t[:, a]] - x[t[:, b]], y[t[:, a]] - y[t[:, b]])
+                      for a, b in ((0, 1), (1, 2), (2, 0))])
+    return x, y, z, t[edges.max(axis=0) <= 1.5 * diag]
+
+def robust_ylim(x, y):
+    """ Giới hạn trục y theo phần lớn dữ liệu khi có cực; trả về (dưới, trên). """
+    finite = y[np.isfinite(y)]
+    if len(finite) == 0:
+        return -1.0, 1.0
+    low, high = weighted_percentile(x, y, [1, 99])
+    if not np.ptp(finite) > 20 * (high - low) > 0:
+        low, high = finite.min(), finite.max()
+    pad = 0.05 * (high - low) or 1.0
+    return low - pad, high + pad
+
+class NumericResult:
+    """ Kết quả tính số (không phải ký hiệu), kèm ước lượng sai số và phương pháp. """
+
+    def __init__(self, value, error, method):
+        self.value = value
+        self.error = error
+        self.method = method
+
+    def __float__(self):
+        return float(self.value)
+
+    def __repr__(self):
+        return f"≈ {self.value:.12g} (±{self.error:.1e}, {self.method}, tính số)"
+
+    __str__ = __repr__
+
+# Nút và trọng số Gauss–Kronrod 7–15 (nửa dương, nút cuối là 0)
+_GK_NODES = np.array([0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+                      0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+                      0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+                      0.207784955007898467600689403773245, 0.0])
+_GK_WEIGHTS = np.array([0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+                        0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+                        0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+                        0.204432940075298892414161999234649, 0.209482141084727828012999174891714])
+_G7_WEIGHTS = np.array([0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+                        0.381830050505118944950369775488975, 0.417959183673469387755102040816327])
+_NODES_15 = np.concatenate([-_GK_NODES[:-1], _GK_NODES[::-1]])
+_WEIGHTS_K15 = np.concatenate([_GK_WEIGHTS[:-1], _GK_WEIGHTS[::-1]])
+_WEIGHTS_G7 = np.zeros(15)
+_WEIGHTS_G7[[1, 3, 5, 7, 9, 11, 13]] = np.concatenate([_G7_WEIGHTS[:-1], _G7_WEIGHTS[::-1]])
+
+def gauss_kronrod(func, a, b, tol=1e-10, max_intervals=4000):
+    """ Tích phân xác định bằng Gauss–Kronrod 7–15 thích nghi, trả về NumericResult.
+
+    Mỗi vòng tính mọi đoạn con đang xét trong một lần gọi func (vector hóa), rồi
+    chia đôi các đoạn có sai số lớn. Cận vô hạn được đổi biến về đoạn hữu hạn.
+    """
+    sign = 1.0
+    if a > b:
+        a, b, sign = b, a, -1.0
+    if a == b:
+        return NumericResult(0.0, 0.0, "Gauss–Kronrod")
+
+    # Đổi biến cho cận vô hạn: x = t / (1 - t^2), x = a + t / (1 - t), x = b - (1 - t) / t
+    if np.isinf(a) and np.isinf(b):
+        g = lambda t: func(t / (1 - t**2)) * (1 + t**2) / (1 - t**2)**2
+        a, b = -1.0, 1.0
+    elif np.isinf(b):
+        a0 = a
+        g = lambda t: func(a0 + t / (1 - t)) / (1 - t)**2
+        a, b = 0.0, 1.0
+    elif np.isinf(a):
+        b0 = b
+        g = lambda t: func(b0 - (1 - t) / t) / t**2
+        a, b = 0.0, 1.0
+    else:
+        g = func
+
+    done_value = 0.0
+    done_error = 0.0
+    left = np.array([a], dtype=float)
+    right = np.array([b], dtype=float)
+    while True:
+        center = (left + right) / 2
+        half = (right - left) / 2
+        values = evaluate_function(g, center[:, None] + half[:, None] * _NODES_15)
+        # Giá trị không xác định (cực, 0/0, ngoài miền) tại một nút: tạm tính là 0 nhưng
+        # đoạn đó luôn bị chia đôi, để điểm kỳ dị thành đầu mút (không bao giờ được tính)
+        bad = ~np.isfinite(values).all(axis=1)
+        values[~np.isfinite(values)] = 0.0
+        with np.errstate(all="ignore"):
+            kronrod = half * (values @ _WEIGHTS_K15)
+            gauss = half * (values @ _WEIGHTS_G7)
+            errors = np.abs(kronrod - gauss)
+        # Tràn số (hàm tăng không giới hạn gần điểm kỳ dị) cũng coi như không xác định
+        overflow = ~np.isfinite(errors)
+        bad |= overflow
+        kronrod[overflow] = errors[overflow] = 0.0
+
+        total = done_value + kronrod.sum()
+        error = done_error + errors.sum()
+        target = max(tol, tol * abs(total))
+        if not bad.any() and error <= target:
+            return NumericResult(sign * total, error, "Gauss–Kronrod")
+        if len(left) * 2 + 1 > max_intervals:
+            if bad.any():
+                # Hàm vẫn không xác định trên phần đoạn còn lại: không có giá trị tin được
+                return NumericResult(np.nan, np.inf, "Gauss–Kronrod")
+            return NumericResult(sign * total, error, "Gauss–Kronrod")
+
+        # Đoạn đủ chính xác thì chốt lại, chỉ chia đôi các đoạn còn lại;
+        # không đoạn nào vượt ngưỡng thì vẫn chia đoạn có sai số lớn nhất
+        split = (errors > target / max(len(left), 1)) | bad
+        if not split.any():
+            split[np.argmax(errors)] = True
+        done_value += kronrod[~split].sum()
+        done_error += errors[~split].sum()
+        left, right, center = left[split], right[split], center[split]
+        left, right = np.concatenate([left, center]), np.concatenate([center, right])
+
+def _richardson(values, ratio=2.0):
+    """ Ngoại suy Richardson cho dãy lấy ở h, h/ratio, h/ratio^2, ...; trả về (giá trị, sai số). """
+    table = [np.array(values, dtype=float)]
+    best, best_error = values[-1], np.inf
+    for j in range(1, len(values)):
+        prev = table[-1]
+        table.append(prev[1:] + (prev[1:] - prev[:-1]) / (ratio**j - 1))
+        if len(table[-1]) >= 1 and np.isfinite(table[-1][-1]):
+            error = abs(table[-1][-1] - table[-2][-1])
+            if error < best_error:
+                best, best_error = table[-1][-1], error
+    return best, best_error
+
+def numeric_limit(func, point, direction=None, h0=0.25, steps=10):
+    """ Giới hạn tính số: lấy mẫu tại point ± h/2^k rồi ngoại suy Richardson về h = 0. """
+    def one_side(side):
+        if np.isinf(point):
+            # x -> ±oo: đặt x = ±1/t với t -> 0+
+            s = np.sign(point)
+            return lambda t: func(s / t)
+        return lambda h: func(point + side * h)
+
+    def side_limit(side):
+        h = h0 * 2.0 ** -np.arange(steps)
+        values = evaluate_function(one_side(side), h)
+        finite = np.isfinite(values)
+        if not finite[-4:].all():
+            last = values[finite][-1] if finite.any() else np.nan
+            return np.copysign(np.inf, last), 0.0
+
+        # Hội tụ thì hiệu hai giá trị liên tiếp giảm đều khi h giảm
+        tail = values[-6:]
+        d = np.abs(np.diff(tail))
+        converging = (d[-1] <= 1e-9 * max(1.0, abs(tail[-1]))
+                      or (np.all(d[1:] <= d[:-1]) and d[-1] <= 0.5 * d[0]))
+        if not converging and np.all(np.diff(np.abs(tail)) > 0):
+            return np.copysign(np.inf, tail[-1]), 0.0
+        if not converging:
+            raise ValueError("Giá trị hàm không hội tụ khi tiến gần điểm, không xác định được giới hạn.")
+        value, error = _richardson(values)
+        # Ước lượng thận trọng: so với lần ngoại suy bỏ đi mẫu gần điểm nhất
+        previous, _ = _richardson(values[:-1])
+        return value, max(error, abs(value - previous))
+
+    if direction == '+' or np.isinf(point):
+        value, error = side_limit(1.0)
+    elif direction == '-':
+        value, error = side_limit(-1.0)
+    else:
+        right_value, right_error = side_limit(1.0)
+        left_value, left_error = side_limit(-1.0)
+        scale = max(1.0, abs(right_value)) if np.isfinite(right_value) else 1.0
+        if right_value != left_value and not abs(right_value - left_value) <= 1e-6 * scale:
+            raise ValueError(f"Giới hạn trái ({left_value:.6g}) và phải ({right_value:.6g}) khác nhau.")
+        value = right_value if np.isinf(right_value) else (right_value + left_value) / 2
+        error = max(right_error, left_error)
+    return NumericResult(value, error, "ngoại suy Richardson")
+
+def numeric_roots(func, derivative, scan_range=(-10, 10), samples=4001, tol=1e-10):
+    """ Tìm nghiệm trên scan_range: chia đôi (vector hóa) các khoảng đổi dấu, Newton cho nghiệm kép. """
+    a, b = scan_range
+    x = np.linspace(a, b, samples)
+    y = evaluate_function(func, x)
+    finite = np.isfinite(y)
+    scale = np.abs(y[finite]).max() if finite.any() else 1.0
+    roots = []
+
+    for i in np.nonzero(y == 0)[0]:
+        roots.append(NumericResult(x[i], 0.0, "quét"))
+
+    # Khoảng đổi dấu: chia đôi đồng thời
+    idx = np.nonzero(finite[:-1] & finite[1:] & (y[:-1] * y[1:] < 0))[0]
+    lo, hi, f_lo = x[idx], x[idx + 1], y[idx]
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        f_mid = evaluate_function(func, mid)
+        left = np.sign(f_mid) == np.sign(f_lo)
+        lo, f_lo = np.where(left, mid, lo), np.where(left, f_mid, f_lo)
+        hi = np.where(left, hi, mid)
+    mid = (lo + hi) / 2
+    residual = np.abs(evaluate_function(func, mid))
+    # Đổi dấu vì cực (tan, 1/x) thì |f| không nhỏ: bỏ
+    for r, width, res in zip(mid, hi - lo, residual):
+        if res <= 1e-6 * max(scale, 1.0):
+            roots.append(NumericResult(r, width, "chia đôi"))
+
+    # Nghiệm kép (chạm trục, không đổi dấu): Newton từ các cực tiểu địa phương của |f|
+    ay = np.where(finite, np.abs(y), np.inf)
+    minima = np.nonzero((ay[1:-1] < ay[:-2]) & (ay[1:-1] <= ay[2:]) & (ay[1:-1] < 1e-2 * max(scale, 1.0)))[0] + 1
+    for i in minima:
+        r = x[i]
+        step = np.inf
+        for _ in range(50):
+            d = float(evaluate_function(derivative, np.array([r]))[0])
+            f_r = float(evaluate_function(func, np.array([r]))[0])
+            if d == 0 or not np.isfinite(d):
+                break
+            step = f_r / d
+            r -= step
+            if abs(step) < tol * max(1.0, abs(r)):
+                break
+        if a <= r <= b and abs(float(evaluate_function(func, np.array([r]))[0])) <= 1e-8 * max(scale, 1.0):
+            roots.append(NumericResult(r, abs(step), "Newton"))
+
+    roots.sort(key=lambda root: root.value)
+    unique = []
+    for root in roots:
+        if not unique or abs(root.value - unique[-1].value) > 1e-7 * max(1.0, abs(root.value)):
+            unique.append(root)
+    return unique
+
+class _Timeout:
+    pass
+
+def run_with_time_budget(func, budget):
+    """ Chạy func trong luồng phụ, chờ tối đa budget giây; quá giờ trả về _Timeout.
+
+    Luồng không dừng được nên vẫn chạy nền tới khi xong; kết quả muộn bị bỏ.
+    Luồng mang tên "time-budget" để tiến trình con nhận ra còn luồng bị bỏ
+    (xem abandoned_threads) và tự thay bằng tiến trình mới.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome["value"] = func()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, name="time-budget", daemon=True)
+    thread.start()
+    thread.join(budget)
+    if thread.is_alive():
+        return _Timeout
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+def abandoned_threads():
+    """ Các luồng của run_with_time_budget đã quá giờ mà vẫn đang chạy. """
+    return [t for t in threading.enumerate() if t.name == "time-budget" and t.is_alive()]
+
+# Kho đệm trên đĩa mặc định của giao diện, dùng chung cho tiến trình chính và các tiến trình con
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".giaitich_cache.sqlite")
+
+class ResultCache:
+    """ Bộ nhớ đệm kết quả ký hiệu: LRU trong RAM giới hạn theo dung lượng, kèm kho SQLite tùy chọn trên đĩa.
+
+    Nhiều tiến trình có thể mở cùng một tệp SQLite (chế độ WAL) để dùng chung kết quả;
+    lỗi khóa / ghi đĩa chỉ làm bỏ qua kho đĩa cho lần đó.
+    """
+
+    def __init__(self, max_bytes=64 * 2**20, path=None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB)")
+            self.db.commit()
+
+    @staticmethod
+    def make_key(operation, canonical, args):
+        text = f"{operation}|{canonical}|{args!r}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """ Trả về (tìm thấy, giá trị). """
+        with self.lock:
+            blob = self.entries.get(key)
+            if blob is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, pickle.loads(blob)
+
+            if self.db is not None:
+                try:
+                    row = self.db.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+                except sqlite3.OperationalError:
+                    row = None
+                if row is not None:
+                    self.disk_hits += 1
+                    self._remember(key, row[0])
+                    return True, pickle.loads(row[0])
+
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        blob = pickle.dumps(value)
+        with self.lock:
+            self._remember(key, blob)
+            if self.db is not None:
+                try:
+                    self.db.execute("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", (key, blob))
+                    self.db.commit()
+                except sqlite3.OperationalError:
+                    # Tiến trình khác giữ khóa quá lâu: kết quả vẫn nằm trong LRU của tiến trình này
+                    self.db.rollback()
+
+    def _remember(self, key, blob):
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        if len(blob) > self.max_bytes:
+            return
+        self.entries[key] = blob
+        self.size += len(blob)
+        # Bỏ các mục ít dùng gần đây nhất cho đến khi vừa dung lượng
+        while self.size > self.max_bytes:
+            _, old = self.entries.popitem(last=False)
+            self.size -= len(old)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self, disk=False):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            if disk and self.db is not None:
+                self.db.execute("DELETE FROM cache")
+                self.db.commit()
+
+class _RawStats:
+    """ Bọc dict thống kê cProfile (vd. nhận từ tiến trình con) để pstats.Stats đọc được. """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+def _enable_profile(profile):
+    """ Bật cProfile; trả False nếu đang có profiler khác (vd. của một luồng bị bỏ do quá giờ, Python 3.12+). """
+    try:
+        profile.enable()
+        return True
+    except ValueError:
+        return False
+
+class Profiler:
+    """ Đo từng lần gọi MathTool theo giai đoạn: parse, cache, symbolic, lambdify, numeric, evaluate, render.
+
+    Mỗi lần gọi thành một bản ghi gồm thao tác, biểu thức, số phép toán (count_ops),
+    thời gian riêng của từng giai đoạn (không tính giai đoạn lồng bên trong) và tổng.
+    cprofile=True thì gom thêm thống kê cProfile để xuất ra tệp .prof.
+    """
+
+    STAGES = ("parse", "cache", "symbolic", "lambdify", "numeric", "evaluate", "render")
+
+    def __init__(self, max_records=500, cprofile=False):
+        self.records = deque(maxlen=max_records)
+        # (thao tác, giai đoạn) -> [số lần, tổng thời gian]
+        self.totals = {}
+        self.cprofile = cprofile
+        self.stats = None
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def call(self, operation, expression):
+        """ Một bản ghi cho một lần gọi; lời gọi lồng (vd. plot gọi compile_function) gộp vào bản ghi ngoài. """
+        if getattr(self.local, "record", None) is not None:
+            yield self.local.record
+            return
+
+        record = {"operation": operation, "expression": str(expression), "ops": None,
+                  "stages": {}, "time": time.time()}
+        self.local.record = record
+        self.local.stack = []
+        profile = cProfile.Profile() if self.cprofile else None
+        if profile and not _enable_profile(profile):
+            profile = None
+        self.local.profile = profile
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            profile = self.local.profile
+            if profile:
+                profile.disable()
+            record["total"] = time.perf_counter() - start
+            self.local.record = None
+            self.local.profile = None
+            if profile:
+                profile.create_stats()
+                self._merge_stats(profile.stats)
+            self.add(record)
+
+    @contextmanager
+    def stage(self, name):
+        record = getattr(self.local, "record", None)
+        if record is None:
+            yield
+            return
+        stack = self.local.stack
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            inner = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            record["stages"][name] = record["stages"].get(name, 0.0) + elapsed - inner
+
+    def annotate_size(self, f):
+        """ Ghi kích thước biểu thức (số phép toán) vào bản ghi hiện tại. """
+        record = getattr(self.local, "record", None)
+        if record is not None and record["ops"] is None:
+            record["ops"] = int(sp.count_ops(f))
+
+    @contextmanager
+    def paused(self):
+        """ Tạm dừng cProfile của call() trong luồng hiện tại, trong lúc một hàm bind() chạy ở luồng khác.
+
+        cProfile không lồng được: từ Python 3.12 bật profiler thứ hai sẽ báo
+        "Another profiling tool is already active".
+        """
+        profile = getattr(self.local, "profile", None)
+        if profile is None:
+            yield
+            return
+        profile.disable()
+        try:
+            yield
+        finally:
+            if not _enable_profile(profile):
+                # Luồng bị bỏ do quá giờ vẫn đang giữ profiler: phần đã ghi vẫn được gộp khi call() kết thúc
+                profile.create_stats()
+                self._merge_stats(profile.stats)
+                self.local.profile = None
+
+    def bind(self, func):
+        """ Bọc func để chạy ở luồng khác vẫn được cProfile ghi lại (cProfile chỉ theo dõi luồng bật nó).
+
+        Nơi gọi phải chạy func trong paused() để hai profiler không cùng bật.
+        """
+        if not self.cprofile:
+            return func
+
+        def profiled():
+            profile = cProfile.Profile()
+            if not _enable_profile(profile):
+                return func()
+            try:
+                return func()
+            finally:
+                profile.disable()
+                profile.create_stats()
+                self._merge_stats(profile.stats)
+        return profiled
+
+    def _merge_stats(self, stats):
+        with self.lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(_RawStats(stats))
+            else:
+                self.stats.add(_RawStats(stats))
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+            for name, seconds in list(record["stages"].items()) + [("total", record["total"])]:
+                entry = self.totals.setdefault((record["operation"], name), [0, 0.0])
+                entry[0] += 1
+                entry[1] += seconds
+
+    def export(self):
+        """ Dữ liệu gửi được qua pipe (từ tiến trình con về tiến trình chính), đọc lại bằng merge(). """
+        with self.lock:
+            return list(self.records), None if self.stats is None else self.stats.stats
+
+    def merge(self, payload):
+        records, stats = payload
+        for record in records:
+            self.add(record)
+        if stats:
+            self._merge_stats(stats)
+
+    def slowest(self, n=20):
+        with self.lock:
+            return sorted(self.records, key=lambda r: r["total"], reverse=True)[:n]
+
+    def summary(self):
+        """ Tổng hợp theo (thao tác, giai đoạn): số lần, tổng và trung bình thời gian. """
+        with self.lock:
+            return [{"operation": operation, "stage": name, "count": count,
+                     "total": total, "mean": total / count}
+                    for (operation, name), (count, total) in sorted(self.totals.items())]
+
+    def export_json(self, path):
+        data = {"summary": self.summary(), "records": list(self.records)}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def dump_cprofile(self, path):
+        """ Ghi thống kê cProfile đã gom (đọc bằng pstats hoặc snakeviz). """
+        with self.lock:
+            if self.stats is None:
+                raise ValueError("Chưa có dữ liệu cProfile (cần Profiler(cprofile=True)).")
+            self.stats.dump_stats(path)
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+            self.totals.clear()
+            self.stats = None
 
 class MathTool:
-    def __init__(self):
-        self.x = sp.Symbol('x')
-        self.y = sp.Symbol('y')
-        self.z = sp.Symbol('z')
+    def __init__(self, cache=True, mode="auto", time_budget=5.0, scan_range=(-10, 10), profiler=None):
+        # cache: True (LRU trong RAM), một ResultCache (vd. có kho trên đĩa) hoặc False để tắt
+        self.cache = ResultCache() if cache is True else (cache or None)
+        # Hàm đã lambdify, theo (srepr của biểu thức, tên biến)
+        self.compiled = OrderedDict()
+        self.max_compiled = 256
+        # mode: "symbolic", "numeric" hoặc "auto" (ký hiệu, quá time_budget giây thì tính số)
+        self.mode = mode
+        self.time_budget = time_budget
+        # Số lần SymPy quá giờ phải chuyển sang tính số (kết quả đó không được lưu đệm)
+        self.timeouts = 0
+        self.scan_range = scan_range
+        # profiler: một Profiler để đo từng giai đoạn, None thì không đo
+        self.profiler = profiler
+
+    def instrument(self, operation, expression):
+        """ Mở một bản ghi đo cho lần gọi (không làm gì nếu chưa bật profiler). """
+        return self.profiler.call(operation, expression) if self.profiler else nullcontext()
+
+    def stage(self, name):
+        return self.profiler.stage(name) if self.profiler else nullcontext()
+
+    # Ký hiệu tạo khi dùng (SymPy tự lưu đệm Symbol), để tạo MathTool không phải nạp SymPy
+    @property
+    def x(self):
+        return sp.Symbol('x')
+
+    @property
+    def y(self):
+        return sp.Symbol('y')
+
+    @property
+    def z(self):
+        return sp.Symbol('z')
+
+    def _cached(self, operation, expression, args, compute):
+        """ Tra bộ nhớ đệm theo (thao tác, srepr của biểu thức, tham số) trước khi chạy SymPy. """
+        with self.stage("parse"):
+            f, canonical = parse_expression(expression)
+        if self.profiler:
+            self.profiler.annotate_size(f)
+        if self.cache is None:
+            return compute(f)
+
+        with self.stage("cache"):
+            key = self.cache.make_key(operation, canonical, args)
+            found, value = self.cache.get(key)
+        if found:
+            return value
+        timeouts = self.timeouts
+        value = compute(f)
+        # Kết quả số do quá giờ phụ thuộc time_budget / tải máy: không lưu để lần sau thử lại SymPy
+        if self.timeouts == timeouts:
+            with self.stage("cache"):
+                self.cache.put(key, value)
+        return value
+
+    def _with_fallback(self, symbolic, numeric):
+        """ Chọn đường ký hiệu / số theo self.mode.
+
+        Ở chế độ "auto", dùng kết quả số khi SymPy quá time_budget, không giải được
+        (NotImplementedError) hoặc trả về biểu thức chưa tính (Integral, Limit).
+        """
+        def run_numeric():
+            with self.stage("numeric"):
+                return numeric()
+
+        if self.mode == "numeric" and numeric is not None:
+            return run_numeric()
+        if self.mode == "symbolic" or numeric is None:
+            with self.stage("symbolic"):
+                return symbolic()
+
+        try:
+            with self.stage("symbolic"):
+                if self.profiler:
+                    with self.profiler.paused():
+                        result = run_with_time_budget(self.profiler.bind(symbolic), self.time_budget)
+                else:
+                    result = run_with_time_budget(symbolic, self.time_budget)
+        except NotImplementedError:
+            return run_numeric()
+        if result is _Timeout:
+            self.timeouts += 1
+            return run_numeric()
+        if (isinstance(result, sp.Basic) and result.has(sp.Integral, sp.Limit)):
+            return run_numeric()
+        return result
+
+    def _numeric_function(self, f, var):
+        var = sp.Symbol(str(var))
+        if f.free_symbols - {var}:
+            raise ValueError("Biểu thức còn tham số khác ngoài biến số, không tính số được.")
+        with self.stage("lambdify"):
+            return sp.lambdify(var, f, 'numpy')
 
     def calculate_limit(self, expression, var, point, direction=None):
-        f = sp.sympify(expression)
-        if direction == '+':
-            return sp.limit(f, var, point, dir='+')
-        elif direction == '-':
-            return sp.limit(f, var, point, dir='-')
-        else:
-            return sp.limit(f, var, point)
+        direction = direction if direction in ('+', '-') else None
+
+        def compute(f):
+            def symbolic():
+                if direction == '+':
+                    return sp.limit(f, var, point, dir='+')
+                elif direction == '-':
+                    return sp.limit(f, var, point, dir='-')
+                else:
+                    return sp.limit(f, var, point)
+            numeric = lambda: numeric_limit(self._numeric_function(f, var), float(point), direction)
+            return self._with_fallback(symbolic, numeric)
+        with self.instrument("limit", expression):
+            return self._cached("limit", expression, (str(var), point, direction, self.mode), compute)
 
     def calculate_derivative(self, expression, var, order=1):
-        f = sp.sympify(expression)
-        return sp.diff(f, var, order)
+        def compute(f):
+            with self.stage("symbolic"):
+                return sp.diff(f, var, order)
+        with self.instrument("derivative", expression):
+            return self._cached("derivative", expression, (str(var), order), compute)
 
     def calculate_integral(self, expression, var, lower_limit=None, upper_limit=None):
-        f = sp.sympify(expression)
-        if lower_limit is not None and upper_limit is not None:
-            return sp.integrate(f, (var, lower_limit, upper_limit))
-        else:
-            return sp.integrate(f, var)
+        definite = lower_limit is not None and upper_limit is not None
+
+        def compute(f):
+            def symbolic():
+                if definite:
+                    return sp.integrate(f, (var, lower_limit, upper_limit))
+                else:
+                    return sp.integrate(f, var)
+            # Chỉ tích phân xác định mới có đường tính số
+            numeric = None
+            if definite:
+                numeric = lambda: gauss_kronrod(self._numeric_function(f, var),
+                                                float(lower_limit), float(upper_limit))
+            return self._with_fallback(symbolic, numeric)
+        with self.instrument("integral", expression):
+            return self._cached("integral", expression, (str(var), lower_limit, upper_limit, self.mode), compute)
 
     def solve_equation(self, expression):
-        try:
-            return sp.solve(sp.Eq(sp.sympify(expression), 0), self.x)
-        except NotImplementedError:
-            return "Phương trình không thể giải được."
-
-    def plot_2d_graph(self, expression, x_range=(-10, 10)):
-        f = sp.lambdify(self.x, sp.sympify(expression), 'numpy')
-        x_vals = np.linspace(x_range[0], x_range[1], 200)
-        y_vals = f(x_vals)
-        plt.plot(x_vals, y_vals)
-        plt.xlabel('x')
-        plt.ylabel('y')
-        plt.title('Đồ thị hàm số')
-        plt.grid(True)
+        def compute(f):
+            def numeric():
+                func = self._numeric_function(f, self.x)
+                with self.stage("lambdify"):
+                    derivative = sp.lambdify(self.x, sp.diff(f, self.x), 'numpy')
+                return numeric_roots(func, derivative, self.scan_range)
+            if self.mode == "symbolic":
+                try:
+                    with self.stage("symbolic"):
+                        return sp.solve(sp.Eq(f, 0), self.x)
+                except NotImplementedError:
+                    return "Phương trình không thể giải được."
+            return self._with_fallback(lambda: sp.solve(sp.Eq(f, 0), self.x), numeric)
+        with self.instrument("solve", expression):
+            return self._cached("solve", expression, (self.mode, self.scan_range), compute)
+
+    def cache_stats(self):
+        """ Thống kê trúng / trượt của bộ nhớ đệm (None nếu đã tắt). """
+        return None if self.cache is None else self.cache.stats()
+
+    def compile_function(self, expression, variables=None):
+        """ lambdify có bộ nhớ đệm: cùng một biểu thức thì không phải biên dịch lại. """
+        variables = tuple(variables) if variables is not None else (self.x,)
+        with self.instrument("compile", expression):
+            with self.stage("parse"):
+                f, canonical = parse_expression(expression)
+            if self.profiler:
+                self.profiler.annotate_size(f)
+            key = (canonical, tuple(str(v) for v in variables))
+            func = self.compiled.get(key)
+            if func is None:
+                with self.stage("lambdify"):
+                    func = sp.lambdify(variables, f, 'numpy')
+                self.compiled[key] = func
+                if len(self.compiled) > self.max_compiled:
+                    self.compiled.popitem(last=False)
+            else:
+                self.compiled.move_to_end(key)
+            return func
+
+    def plot_2d_graph(self, expression, x_range=(-10, 10), max_points=2000):
+        with self.instrument("plot_2d", expression):
+            f = self.compile_function(expression)
+            with self.stage("evaluate"):
+                x_vals, y_vals = adaptive_sample(f, x_range, max_points)
+            with self.stage("render"):
+                plt.plot(x_vals, y_vals)
+                # Có cực thì giới hạn trục y theo phần lớn dữ liệu thay vì theo giá trị cực
+                plt.ylim(*robust_ylim(x_vals, y_vals))
+
+                plt.xlabel('x')
+                plt.ylabel('y')
+                plt.title('Đồ thị hàm số')
+                plt.grid(True)
         plt.show()
 
-    def plot_3d_graph(self, expression, x_range=(-5, 5), y_range=(-5, 5)):
-        f = sp.lambdify((self.x, self.y), sp.sympify(expression), 'numpy')
-        x_vals, y_vals = np.mgrid[x_range[0]:x_range[1]:0.25, y_range[0]:y_range[1]:0.25]
-        z_vals = f(x_vals, y_vals)
-        fig = plt.figure()
-        ax = fig.add_subplot(111, projection='3d')
-        ax.plot_surface(x_vals, y_vals, z_vals)
-        ax.set_xlabel('x')
-        ax.set_ylabel('y')
-        ax.set_zlabel('z')
-        plt.title('Đồ thị hàm số 3D')
+    def plot_3d_graph(self, expression, x_range=(-5, 5), y_range=(-5, 5), lod=False,
+                      target_triangles=20000, dtype=np.float32, memory_budget=64 * 2**20):
+        with self.instrument("plot_3d", expression):
+            f = self.compile_function(expression, (self.x, self.y))
+            with self.stage("evaluate"):
+                if lod:
+                    # Lưới nhiều mức chi tiết: số tam giác cố định, không phụ thuộc độ rộng miền
+                    x_vals, y_vals, z_vals, triangles = lod_surface(f, x_range, y_range, target_triangles,
+                                                                    dtype, memory_budget)
+                else:
+                    x_vals, y_vals = np.mgrid[x_range[0]:x_range[1]:0.25, y_range[0]:y_range[1]:0.25]
+                    z_vals = evaluate_function(f, x_vals, y_vals)
+            with self.stage("render"):
+                fig = plt.figure()
+                ax = fig.add_subplot(111, projection='3d')
+                if lod:
+                    ax.plot_trisurf(x_vals, y_vals, z_vals, triangles=triangles)
+                else:
+                    ax.plot_surface(x_vals, y_vals, z_vals)
+                ax.set_xlabel('x')
+                ax.set_ylabel('y')
+                ax.set_zlabel('z')
+                plt.title('Đồ thị hàm số 3D')
         plt.show()
 
+class LivePlot:
+    """ Đồ thị nhúng trong tab: dùng lại một Figure, chỉ cập nhật dữ liệu của đường vẽ.
+
+    Khi kéo / phóng to, chỉ phần trục x mới lộ ra được tính thêm qua hàm đã biên
+    dịch sẵn; phóng to quá sâu thì lấy mẫu lại riêng vùng đang nhìn. Mỗi lần cập
+    nhật đều đổi trục (vạch chia, tiêu đề) nên hình được vẽ lại đầy đủ, không blit.
+    """
+
+    def __init__(self, figure, canvas, math_tool, max_points=2000, min_points=300):
+        self.figure = figure
+        self.canvas = canvas
+        self.tool = math_tool
+        self.max_points = max_points
+        self.min_points = min_points
+
+        self.ax = figure.add_subplot(111)
+        self.ax.grid(True)
+        self.ax.set_xlabel('x')
+        self.ax.set_ylabel('y')
+        self.line, = self.ax.plot([], [])
+        self.ax3d = None
+
+        self.func = None
+        self.expression = None
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.updating = False
+
+        self.ax.callbacks.connect("xlim_changed", self.on_xlim_changed)
+
+    def plot_2d(self, expression, x_range=(-10, 10)):
+        with self.tool.instrument("plot_2d", expression):
+            self.func = self.tool.compile_function(expression)
+            self.expression = expression
+            with self.tool.stage("evaluate"):
+                self.x, self.y = adaptive_sample(self.func, x_range, self.max_points)
+
+            with self.tool.stage("render"):
+                self.line.set_data(self.x, self.y)
+                if self.ax3d is not None:
+                    self.ax3d.remove()
+                    self.ax3d = None
+                    self.ax.set_visible(True)
+
+                # Đặt giới hạn trục trực tiếp (không tự co giãn) và không tính lại dữ liệu vừa lấy
+                self.updating = True
+                self.ax.set_xlim(*x_range)
+                self.ax.set_ylim(*robust_ylim(self.x, self.y))
+                self.updating = False
+                self.ax.set_title(f"y = {expression}")
+                # Trục và tiêu đề đổi nên vẽ lại cả hình
+                self.canvas.draw_idle()
+
+    def on_xlim_changed(self, ax):
+        if self.func is None or self.updating:
+            return
+        with self.tool.instrument("pan_zoom", self.expression):
+            with self.tool.stage("evaluate"):
+                self.extend_to(*ax.get_xlim())
+            # Thanh công cụ vẽ lại cả hình sau khi đổi trục, đường mới được vẽ cùng lúc
+            self.line.set_data(self.x, self.y)
+
+    def extend_to(self, a, b):
+        """ Chỉ tính thêm các khoảng x mới lộ ra (và lấy mẫu lại nếu vùng nhìn quá thưa). """
+        width = b - a
+        xs, ys = [self.x], [self.y]
+        low, high = (self.x[0], self.x[-1]) if len(self.x) else (b, a)
+
+        def budget(span):
+            return max(50, int(self.max_points * min(span / width, 1.0)))
+
+        if a < low:
+            x_new, y_new = adaptive_sample(self.func, (a, min(low, b)), budget(min(low, b) - a))
+            xs.append(x_new[:-1])
+            ys.append(y_new[:-1])
+        if b > high:
+            x_new, y_new = adaptive_sample(self.func, (max(high, a), b), budget(b - max(high, a)))
+            xs.append(x_new[1:])
+            ys.append(y_new[1:])
+
+        x = np.concatenate(xs)
+        y = np.concatenate(ys)
+
+        in_view = (x >= a) & (x <= b)
+        if in_view.sum() < self.min_points:
+            x_new, y_new = adaptive_sample(self.func, (a, b), self.max_points)
+            x = np.concatenate([x[~in_view], x_new])
+            y = np.concatenate([y[~in_view], y_new])
+
+        order = np.argsort(x, kind="stable")
+        x, y = x[order], y[order]
+
+        # Bỏ các điểm quá xa vùng nhìn để bộ nhớ không tăng mãi khi kéo
+        keep = (x >= a - 2 * width) & (x <= b + 2 * width)
+        self.x, self.y = x[keep], y[keep]
+
+    def plot_3d(self, expression, x_range=(-5, 5), y_range=(-5, 5), target_triangles=20000):
+        with self.tool.instrument("plot_3d", expression):
+            f = self.tool.compile_function(expression, (self.tool.x, self.tool.y))
+            with self.tool.stage("evaluate"):
+                x_vals, y_vals, z_vals, triangles = lod_surface(f, x_range, y_range, target_triangles)
+
+            with self.tool.stage("render"):
+                self.ax.set_visible(False)
+                if self.ax3d is None:
+                    self.ax3d = self.figure.add_subplot(111, projection='3d')
+                else:
+                    self.ax3d.clear()
+                self.ax3d.plot_trisurf(x_vals, y_vals, z_vals, triangles=triangles)
+                self.ax3d.set_xlabel('x')
+                self.ax3d.set_ylabel('y')
+                self.ax3d.set_zlabel('z')
+                self.ax3d.set_title(f"z = {expression}")
+                self.canvas.draw_idle()
+
+def _open_cache(path):
+    """ ResultCache có kho đĩa tại path; không mở được tệp thì chỉ dùng LRU trong RAM. """
+    if path is None:
+        return ResultCache()
+    try:
+        return ResultCache(path=path)
+    except (sqlite3.Error, OSError):
+        return ResultCache()
+
+def _math_worker(tasks, results, cache_path=None):
+    """ Vòng lặp của tiến trình con: nhận (thao tác, tham số, chế độ, time_budget, đo),
+    trả (thành công, kết quả, số đo, cần thay tiến trình).
+
+    đo: None, "stages" (chỉ thời gian theo giai đoạn) hoặc "cprofile" (thêm thống kê cProfile).
+    Còn luồng SymPy bị bỏ do quá giờ thì tiến trình báo cần thay rồi thoát, để luồng
+    đó không chiếm CPU / bộ nhớ của các công việc sau.
+    cache_path: tệp SQLite dùng chung giữa các tiến trình con (và tiến trình chính), để
+    kết quả không mất khi tiến trình bị thay và không phải tính lại ở tiến trình khác.
+    """
+    tool = MathTool(cache=_open_cache(cache_path))
+    while True:
+        job = tasks.recv()
+        if job is None:
+            break
+        operation, args, mode, time_budget, profile = job
+        tool.mode = mode
+        tool.time_budget = time_budget
+        tool.profiler = Profiler(cprofile=profile == "cprofile") if profile else None
+        try:
+            outcome = (True, getattr(tool, operation)(*args))
+        except Exception as e:
+            outcome = (False, str(e))
+        recycle = bool(abandoned_threads())
+        results.send(outcome + (tool.profiler.export() if tool.profiler else None, recycle))
+        if recycle:
+            break
+
+class MathJobRunner:
+    """ Chạy các thao tác MathTool trong tiến trình con, có giới hạn thời gian và hủy được.
+
+    Không chặn: giao diện gọi poll() định kỳ (qua after()); callback(status, value)
+    được gọi trên luồng chính với status là "ok", "error", "timeout" hoặc "cancelled".
+    Tiến trình bị quá giờ hoặc bị hủy sẽ bị kết thúc và thay bằng tiến trình mới.
+    """
+
+    def __init__(self, workers=2, cache_path=None):
+        # "spawn": tiến trình con không thừa hưởng kết nối Tk của tiến trình cha
+        self.ctx = mp.get_context("spawn")
+        # Kho đệm SQLite dùng chung cho mọi tiến trình con (None: mỗi tiến trình một LRU riêng)
+        self.cache_path = cache_path
+        self.idle = [self._spawn() for _ in range(workers)]
+        self.pending = deque()
+        self.running = {}
+        self.next_id = 0
+        # Các biểu thức mỗi tiến trình con đã phân tích (theo pid), để giao việc cùng biểu thức
+        self.seen = {}
+        # Gán một Profiler để nhận số đo từng giai đoạn từ tiến trình con
+        self.profiler = None
+
+    def _spawn(self):
+        task_recv, task_send = self.ctx.Pipe(duplex=False)
+        result_recv, result_send = self.ctx.Pipe(duplex=False)
+        proc = self.ctx.Process(target=_math_worker, args=(task_recv, result_send, self.cache_path), daemon=True)
+        proc.start()
+        task_recv.close()
+        result_send.close()
+        return proc, task_send, result_recv
+
+    def _kill(self, worker):
+        proc, task_send, result_recv = worker
+        self.seen.pop(proc.pid, None)
+        proc.terminate()
+        proc.join(timeout=1)
+        task_send.close()
+        result_recv.close()
+
+    def submit(self, operation, args, timeout, callback, mode="auto", key=None, time_budget=5.0):
+        """ Xếp một thao tác vào hàng đợi; trả về mã công việc dùng cho cancel().
+
+        key (thường là chuỗi biểu thức): ưu tiên tiến trình đã xử lý cùng key để
+        dùng lại kết quả sympify đã lưu trong tiến trình đó.
+        time_budget: số giây cho SymPy ở chế độ "auto" trước khi tính số; giới hạn ở
+        nửa timeout để phần tính số còn thời gian chạy.
+        """
+        job_id = self.next_id
+        self.next_id += 1
+        time_budget = min(time_budget, timeout / 2)
+        self.pending.append((job_id, operation, args, mode, time_budget, timeout, callback, key))
+        self._start_pending()
+        return job_id
+
+    def _start_pending(self):
+        while self.pending and self.idle:
+            job_id, operation, args, mode, time_budget, timeout, callback, key = self.pending.popleft()
+            worker = next((w for w in self.idle if key in self.seen.get(w[0].pid, ())), self.idle[-1])
+            self.idle.remove(worker)
+            profile = None if self.profiler is None else ("cprofile" if self.profiler.cprofile else "stages")
+            worker[1].send((operation, args, mode, time_budget, profile))
+            if key is not None:
+                seen = self.seen.setdefault(worker[0].pid, OrderedDict())
+                seen[key] = True
+                seen.move_to_end(key)
+                if len(seen) > 1024:
+                    seen.popitem(last=False)
+            self.running[job_id] = (worker, time.monotonic() + timeout, callback)
+
+    def cancel(self, job_id):
+        for job in self.pending:
+            if job[0] == job_id:
+                self.pending.remove(job)
+                job[6]("cancelled", None)
+                return
+        if job_id in self.running:
+            worker, _, callback = self.running.pop(job_id)
+            self._kill(worker)
+            self.idle.append(self._spawn())
+            callback("cancelled", None)
+            self._start_pending()
+
+    def poll(self):
+        """ Nhận kết quả đã xong và dừng các công việc quá thời gian. """
+        now = time.monotonic()
+        for job_id, (worker, deadline, callback) in list(self.running.items()):
+            if worker[2].poll():
+                del self.running[job_id]
+                try:
+                    ok, value, profile, recycle = worker[2].recv()
+                    if recycle:
+                        # Tiến trình con còn luồng SymPy bị bỏ và đã tự thoát
+                        self._kill(worker)
+                        self.idle.append(self._spawn())
+                    else:
+                        self.idle.append(worker)
+                    if profile and self.profiler is not None:
+                        self.profiler.merge(profile)
+                except EOFError:
+                    ok, value = False, "Tiến trình tính toán bị dừng bất thường."
+                    self._kill(worker)
+                    self.idle.append(self._spawn())
+                callback("ok" if ok else "error", value)
+            elif now > deadline:
+                del self.running[job_id]
+                self._kill(worker)
+                self.idle.append(self._spawn())
+                callback("timeout", None)
+        self._start_pending()
+
+    def wait(self, timeout=0.1):
+        """ Chặn tới khi có kết quả mới hoặc tới hạn của một công việc (tối đa timeout giây), rồi poll().
+
+        Dùng cho chế độ không giao diện thay cho vòng after() của Tk.
+        """
+        if self.running:
+            connections = [worker[2] for worker, _, _ in self.running.values()]
+            deadline = min(d for _, d, _ in self.running.values())
+            mp.connection.wait(connections, timeout=max(0.0, min(timeout, deadline - time.monotonic())))
+        self.poll()
+
+    def shutdown(self):
+        for job_id in list(self.running):
+            self.cancel(job_id)
+        for worker in self.idle:
+            self._kill(worker)
+        self.idle = []
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Phần mềm hỗ trợ học tập Giải tích")
         self.geometry("800x700")
 
-        self.math_tool = MathTool()
+        # Kho đệm trên đĩa dùng chung với các tiến trình con, giữ lại qua các lần mở
+        self.math_tool = MathTool(cache=_open_cache(DEFAULT_CACHE_PATH))
+
+        # Phép tính ký hiệu chạy ở tiến trình con để cửa sổ không bị treo
+        self.job_timeout = 30
+        # Ở chế độ "auto": số giây cho SymPy trước khi chuyển sang tính số
+        self.time_budget = 5.0
+        self.jobs = MathJobRunner(cache_path=DEFAULT_CACHE_PATH)
+        self.active_jobs = {}
+        # Đo hiệu năng: tắt mặc định, bật ở tab "Hiệu năng"
+        self.profiler = None
         self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(100, self.poll_jobs)
+
+        # Nạp SymPy / Matplotlib ở luồng nền sau khi cửa sổ đã hiện
+        self.warm_times = {}
+        self.warm_error = None
+        self.warm_thread = threading.Thread(target=self.warm_up, daemon=True)
+        self.after_idle(self.warm_thread.start)
+
+    def warm_up(self):
+        """ Nạp trước các thư viện nặng để lần dùng đầu không phải chờ; ghi thời gian nạp từng cái.
+
+        Nạp lỗi thì dừng và ghi lý do vào warm_error (lần dùng đầu sẽ báo lỗi như bình thường).
+        """
+        for name in ("sympy", "matplotlib.figure", "matplotlib.backends.backend_tkagg"):
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as exc:
+                self.warm_error = f"{name}: {exc}"
+                return
+            self.warm_times[name] = time.perf_counter() - start
 
     def create_widgets(self):
+        # Chế độ tính: ký hiệu, số, hoặc tự động chuyển sang tính số khi SymPy quá lâu
+        mode_frame = ttk.Frame(self)
+        mode_frame.pack(fill="x", padx=5, pady=5)
+        ttk.Label(mode_frame, text="Chế độ tính:").pack(side="left")
+        self.compute_mode_var = tk.StringVar(self, value="auto")
+        ttk.OptionMenu(mode_frame, self.compute_mode_var, "auto", "auto", "symbolic", "numeric").pack(side="left")
+
         # Notebook
         notebook = ttk.Notebook(self)
         notebook.pack(expand=True, fill="both")
+        notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         self.create_limit_tab(notebook)
         self.create_derivative_tab(notebook)
         self.create_integral_tab(notebook)
         self.create_equation_tab(notebook)
         self.create_graph_tab(notebook)
+        self.create_profile_tab(notebook)
 
         # Ô hướng dẫn
         self.instructions_text = tk.Text(self, wrap="word", height=5)
@@ -115,7 +1363,10 @@ class App(tk.Tk):
         direction_options = ["Không", "+", "-"]
         ttk.OptionMenu(limit_tab, self.limit_direction_var, *direction_options).grid(row=2, column=1)
 
-        ttk.Button(limit_tab, text="Tính toán", command=self.calculate_limit).grid(row=3, column=0, columnspan=4)
+        ttk.Button(limit_tab, text="Tính toán", command=self.calculate_limit).grid(row=3, column=0, columnspan=2)
+        self.limit_cancel_button = ttk.Button(limit_tab, text="Hủy", state="disabled",
+                                              command=lambda: self.cancel_job(self.limit_result_label))
+        self.limit_cancel_button.grid(row=3, column=2, columnspan=2)
 
         # Output
         self.limit_result_label = ttk.Label(limit_tab, text="")
@@ -148,7 +1399,10 @@ class App(tk.Tk):
         self.derivative_order_entry.insert(0, "1")  # Default order is 1
         self.derivative_order_entry.grid(row=1, column=3)
 
-        ttk.Button(derivative_tab, text="Tính toán", command=self.calculate_derivative).grid(row=2, column=0, columnspan=4)
+        ttk.Button(derivative_tab, text="Tính toán", command=self.calculate_derivative).grid(row=2, column=0, columnspan=2)
+        self.derivative_cancel_button = ttk.Button(derivative_tab, text="Hủy", state="disabled",
+                                                   command=lambda: self.cancel_job(self.derivative_result_label))
+        self.derivative_cancel_button.grid(row=2, column=2, columnspan=2)
 
         # Output
         self.derivative_result_label = ttk.Label(derivative_tab, text="")
@@ -183,7 +1437,10 @@ class App(tk.Tk):
         self.integral_upper_limit_entry = ttk.Entry(integral_tab, width=10)
         self.integral_upper_limit_entry.grid(row=2, column=3)
 
-        ttk.Button(integral_tab, text="Tính toán", command=self.calculate_integral).grid(row=3, column=0, columnspan=4)
+        ttk.Button(integral_tab, text="Tính toán", command=self.calculate_integral).grid(row=3, column=0, columnspan=2)
+        self.integral_cancel_button = ttk.Button(integral_tab, text="Hủy", state="disabled",
+                                                 command=lambda: self.cancel_job(self.integral_result_label))
+        self.integral_cancel_button.grid(row=3, column=2, columnspan=2)
 
         # Output
         self.integral_result_label = ttk.Label(integral_tab, text="")
@@ -206,7 +1463,10 @@ class App(tk.Tk):
         self.equation_entry = ttk.Entry(equation_tab, width=50)
         self.equation_entry.grid(row=0, column=1)
 
-        ttk.Button(equation_tab, text="Giải", command=self.solve_equation).grid(row=1, column=0, columnspan=2)
+        ttk.Button(equation_tab, text="Giải", command=self.solve_equation).grid(row=1, column=0)
+        self.equation_cancel_button = ttk.Button(equation_tab, text="Hủy", state="disabled",
+                                                 command=lambda: self.cancel_job(self.equation_result_label))
+        self.equation_cancel_button.grid(row=1, column=1)
 
         # Output
         self.equation_result_label = ttk.Label(equation_tab, text="")
@@ -230,22 +1490,158 @@ class App(tk.Tk):
         ttk.Button(graph_tab, text="Vẽ đồ thị 2D", command=self.plot_2d).grid(row=1, column=0, columnspan=2)
         ttk.Button(graph_tab, text="Vẽ đồ thị 3D", command=self.plot_3d).grid(row=1, column=2, columnspan=2)
 
-        # Output
-        self.graph_canvas = None
+        # Output: Figure nhúng được tạo khi mở tab lần đầu (xem build_graph_canvas)
+        self.graph_tab = graph_tab
+        self.live_plot = None
+        graph_tab.rowconfigure(2, weight=1)
+        graph_tab.columnconfigure(1, weight=1)
+
         graph_tab.bind("<Visibility>", lambda event: self.update_instructions(
             "Hướng dẫn vẽ đồ thị:\n"
             "1. Nhập hàm số (ví dụ: x^2 - 1).\n"
-            "2. Nhấn nút 'Vẽ đồ thị 2D' hoặc 'Vẽ đồ thị 3D'."
+            "2. Nhấn nút 'Vẽ đồ thị 2D' hoặc 'Vẽ đồ thị 3D'.\n"
+            "3. Dùng thanh công cụ dưới đồ thị để kéo / phóng to; phần mới lộ ra được tính thêm."
         ))
 
+    def build_graph_canvas(self):
+        """ Tạo một Figure nhúng dùng lại cho mọi lần vẽ; chỉ nạp Matplotlib ở lần gọi đầu. """
+        if self.live_plot is not None:
+            return self.live_plot
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from matplotlib.figure import Figure
+
+        figure = Figure(figsize=(6, 4), dpi=100)
+        self.graph_canvas = FigureCanvasTkAgg(figure, master=self.graph_tab)
+        self.live_plot = LivePlot(figure, self.graph_canvas, self.math_tool)
+        toolbar = NavigationToolbar2Tk(self.graph_canvas, self.graph_tab, pack_toolbar=False)
+        self.graph_canvas.get_tk_widget().grid(row=2, column=0, columnspan=4, sticky="nsew")
+        toolbar.grid(row=3, column=0, columnspan=4, sticky="ew")
+        return self.live_plot
+
+    def on_tab_changed(self, event):
+        notebook = event.widget
+        if notebook.nametowidget(notebook.select()) is self.graph_tab:
+            self.build_graph_canvas()
+
+    def create_profile_tab(self, notebook):
+        profile_tab = ttk.Frame(notebook)
+        notebook.add(profile_tab, text="Hiệu năng")
+
+        self.profile_enabled_var = tk.BooleanVar(self, value=False)
+        self.profile_cprofile_var = tk.BooleanVar(self, value=False)
+        ttk.Checkbutton(profile_tab, text="Bật đo", variable=self.profile_enabled_var,
+                        command=self.toggle_profiling).grid(row=0, column=0, sticky="w")
+        ttk.Checkbutton(profile_tab, text="Gom cProfile", variable=self.profile_cprofile_var,
+                        command=self.toggle_profiling).grid(row=0, column=1, sticky="w")
+        ttk.Button(profile_tab, text="Làm mới", command=self.refresh_profile_panel).grid(row=0, column=2)
+        ttk.Button(profile_tab, text="Xuất JSON", command=self.export_profile_json).grid(row=0, column=3)
+        ttk.Button(profile_tab, text="Xuất cProfile", command=self.export_profile_cprofile).grid(row=0, column=4)
+
+        # Các lần gọi chậm nhất gần đây
+        columns = ("total", "operation", "expression", "ops", "stages")
+        self.profile_tree = ttk.Treeview(profile_tab, columns=columns, show="headings", height=12)
+        for column, heading, width in zip(columns, ("Tổng (ms)", "Thao tác", "Biểu thức", "Số phép toán", "Giai đoạn (ms)"),
+                                          (80, 90, 200, 90, 320)):
+            self.profile_tree.heading(column, text=heading)
+            self.profile_tree.column(column, width=width, anchor="w")
+        self.profile_tree.grid(row=1, column=0, columnspan=5, sticky="nsew")
+        profile_tab.rowconfigure(1, weight=1)
+        profile_tab.columnconfigure(4, weight=1)
+
+        profile_tab.bind("<Visibility>", lambda event: (self.refresh_profile_panel(), self.update_instructions(
+            "Đo hiệu năng:\n"
+            "1. Chọn 'Bật đo' rồi dùng các tab khác như bình thường.\n"
+            "2. Bảng liệt kê các lần gọi chậm nhất, chia theo giai đoạn "
+            "(parse, cache, symbolic, lambdify, numeric, evaluate, render).\n"
+            "3. 'Xuất JSON' ghi toàn bộ số đo; 'Xuất cProfile' cần bật 'Gom cProfile'."
+        )))
+
+    def toggle_profiling(self):
+        if not self.profile_enabled_var.get():
+            self.profiler = None
+        elif self.profiler is None:
+            self.profiler = Profiler(cprofile=self.profile_cprofile_var.get())
+        else:
+            self.profiler.cprofile = self.profile_cprofile_var.get()
+        self.math_tool.profiler = self.profiler
+        self.jobs.profiler = self.profiler
+
+    def refresh_profile_panel(self):
+        self.profile_tree.delete(*self.profile_tree.get_children())
+        if self.profiler is None:
+            return
+        for record in self.profiler.slowest(50):
+            stages = ", ".join(f"{name} {seconds * 1e3:.1f}"
+                               for name, seconds in sorted(record["stages"].items(), key=lambda item: -item[1]))
+            self.profile_tree.insert("", tk.END, values=(
+                f"{record['total'] * 1e3:.1f}", record["operation"], record["expression"],
+                "" if record["ops"] is None else record["ops"], stages))
+
+    def export_profile_json(self):
+        if self.profiler is None:
+            messagebox.showinfo("Hiệu năng", "Chưa bật đo.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if path:
+            self.profiler.export_json(path)
+
+    def export_profile_cprofile(self):
+        if self.profiler is None:
+            messagebox.showinfo("Hiệu năng", "Chưa bật đo.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".prof", filetypes=[("cProfile", "*.prof")])
+        if path:
+            try:
+                self.profiler.dump_cprofile(path)
+            except ValueError as e:
+                messagebox.showerror("Lỗi", str(e))
+
+    def poll_jobs(self):
+        self.jobs.poll()
+        self.after(100, self.poll_jobs)
+
+    def on_close(self):
+        self.jobs.shutdown()
+        self.destroy()
+
+    def run_job(self, operation, args, result_label, cancel_button, prefix="Kết quả"):
+        """ Gửi một thao tác MathTool cho tiến trình con; kết quả hiện lên result_label khi xong. """
+        self.cancel_job(result_label)
+
+        def done(status, value):
+            if self.active_jobs.get(result_label, (None,))[0] != job_id:
+                return
+            del self.active_jobs[result_label]
+            cancel_button.config(state="disabled")
+            if status == "ok":
+                result_label.config(text=f"{prefix}: {value}")
+            elif status == "error":
+                result_label.config(text=f"Lỗi: {value}")
+            elif status == "timeout":
+                result_label.config(text=f"Quá {self.job_timeout} giây, đã dừng phép tính.")
+            else:
+                result_label.config(text="Đã hủy phép tính.")
+            if self.profiler is not None:
+                self.refresh_profile_panel()
+
+        result_label.config(text="Đang tính...")
+        cancel_button.config(state="normal")
+        job_id = self.jobs.submit(operation, args, self.job_timeout, done, self.compute_mode_var.get(),
+                                  time_budget=self.time_budget)
+        self.active_jobs[result_label] = (job_id, cancel_button)
+
+    def cancel_job(self, result_label):
+        if result_label in self.active_jobs:
+            self.jobs.cancel(self.active_jobs[result_label][0])
+
     def calculate_limit(self):
         expression = self.limit_expression_entry.get()
         var = self.limit_var_entry.get()
         point = self.limit_point_entry.get()
         direction = self.limit_direction_var.get()
         try:
-            result = self.math_tool.calculate_limit(expression, var, float(point), direction)
-            self.limit_result_label.config(text=f"Kết quả: {result}")
+            self.run_job("calculate_limit", (expression, var, float(point), direction),
+                         self.limit_result_label, self.limit_cancel_button)
         except Exception as e:
             self.limit_result_label.config(text=f"Lỗi: {e}")
 
@@ -254,8 +1650,8 @@ class App(tk.Tk):
         var = self.derivative_var_entry.get()
         order = self.derivative_order_entry.get()
         try:
-            result = self.math_tool.calculate_derivative(expression, var, int(order))
-            self.derivative_result_label.config(text=f"Kết quả: {result}")
+            self.run_job("calculate_derivative", (expression, var, int(order)),
+                         self.derivative_result_label, self.derivative_cancel_button)
         except Exception as e:
             self.derivative_result_label.config(text=f"Lỗi: {e}")
 
@@ -266,36 +1662,228 @@ class App(tk.Tk):
         upper_limit = self.integral_upper_limit_entry.get()
         try:
             if lower_limit and upper_limit:
-                result = self.math_tool.calculate_integral(expression, var, float(lower_limit), float(upper_limit))
+                args = (expression, var, float(lower_limit), float(upper_limit))
             else:
-                result = self.math_tool.calculate_integral(expression, var)
-            self.integral_result_label.config(text=f"Kết quả: {result}")
+                args = (expression, var)
+            self.run_job("calculate_integral", args,
+                         self.integral_result_label, self.integral_cancel_button)
         except Exception as e:
             self.integral_result_label.config(text=f"Lỗi: {e}")
 
     def solve_equation(self):
         equation = self.equation_entry.get()
         try:
-            result = self.math_tool.solve_equation(equation)
-            self.equation_result_label.config(text=f"Nghiệm: {result}")
+            self.run_job("solve_equation", (equation,),
+                         self.equation_result_label, self.equation_cancel_button, prefix="Nghiệm")
         except Exception as e:
             self.equation_result_label.config(text=f"Lỗi: {e}")
 
     def plot_2d(self):
         expression = self.graph_expression_entry.get()
         try:
-            self.math_tool.plot_2d_graph(expression)
+            self.build_graph_canvas().plot_2d(expression)
+            if self.profiler is not None:
+                self.refresh_profile_panel()
         except Exception as e:
             messagebox.showerror("Lỗi", f"Không thể vẽ đồ thị. {e}")
 
     def plot_3d(self):
         expression = self.graph_expression_entry.get()
         try:
-            self.math_tool.plot_3d_graph(expression)
+            self.build_graph_canvas().plot_3d(expression)
+            if self.profiler is not None:
+                self.refresh_profile_panel()
         except Exception as e:
             messagebox.showerror("Lỗi", f"Không thể vẽ đồ thị. {e}")
 
 
+def read_jobs(path):
+    """ Đọc lần lượt các công việc từ tệp JSONL (hoặc stdin với "-"), mỗi dòng một đối tượng.
+
+    Trả về dần (công việc, lỗi): dòng không đọc được cho ({"id": số dòng}, thông báo lỗi)
+    để nơi gọi ghi lỗi cho riêng dòng đó rồi chạy tiếp.
+    """
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for number, line in enumerate(stream):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"id": number}, f"Dòng {number + 1} không phải JSON hợp lệ: {e}"
+                continue
+            if not isinstance(job, dict):
+                yield {"id": number}, f"Dòng {number + 1} không phải một đối tượng JSON."
+                continue
+            job.setdefault("id", number)
+            yield job, None
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def job_call(job):
+    """ Chuyển một công việc JSON thành (tên phương thức MathTool, tham số).
+
+    Trường dùng: operation (derivative / integral / limit / solve), expression,
+    variable (mặc định "x"), order, lower, upper, point, direction.
+    """
+    operation = job["operation"]
+    expression = job["expression"]
+    var = sp.Symbol(job.get("variable", "x"))
+    if operation == "derivative":
+        return "calculate_derivative", (expression, var, int(job.get("order", 1)))
+    if operation == "integral":
+        if job.get("lower") is not None and job.get("upper") is not None:
+            return "calculate_integral", (expression, var, sp.sympify(job["lower"]), sp.sympify(job["upper"]))
+        return "calculate_integral", (expression, var)
+    if operation == "limit":
+        return "calculate_limit", (expression, var, sp.sympify(job["point"]), job.get("direction"))
+    if operation == "solve":
+        return "solve_equation", (expression,)
+    raise ValueError(f"Thao tác không hợp lệ: {operation}")
+
+def format_job_result(job, status, value, elapsed):
+    record = {
+        "id": job.get("id"),
+        "operation": job.get("operation"),
+        "expression": job.get("expression"),
+        "status": status,
+        "elapsed": round(elapsed, 6),
+    }
+    if status == "ok":
+        values = value if isinstance(value, list) else [value]
+        record["result"] = [str(v) for v in value] if isinstance(value, list) else str(value)
+        numeric = [v for v in values if isinstance(v, NumericResult)]
+        if numeric:
+            record["numeric"] = True
+            record["error_estimate"] = max(v.error for v in numeric)
+    elif status == "error":
+        record["error"] = str(value)
+    return json.dumps(record, ensure_ascii=False)
+
+def main(argv=None):
+    """ Chế độ dòng lệnh: chạy hàng loạt công việc giải tích từ tệp JSONL, không cần giao diện. """
+    parser = argparse.ArgumentParser(description="Chạy hàng loạt phép tính giải tích (JSONL).")
+    parser.add_argument("input", help="Tệp .jsonl các công việc, hoặc '-' để đọc stdin")
+    parser.add_argument("-o", "--output", default="-", help="Tệp kết quả JSONL (mặc định stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Số tiến trình")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Giới hạn thời gian mỗi công việc (giây)")
+    parser.add_argument("--mode", choices=["auto", "symbolic", "numeric"], default="auto", help="Chế độ tính")
+    parser.add_argument("--time-budget", type=float, default=5.0,
+                        help="Số giây cho SymPy ở chế độ auto trước khi tính số (tối đa nửa --timeout)")
+    parser.add_argument("--max-pending", type=int, default=None, help="Số công việc tối đa đang chờ / chạy")
+    parser.add_argument("--profile", help="Ghi số đo theo giai đoạn của mọi công việc ra tệp JSON")
+    parser.add_argument("--cprofile", help="Ghi thống kê cProfile gộp của mọi công việc ra tệp .prof")
+    parser.add_argument("--cache", help="Tệp SQLite lưu đệm kết quả, dùng chung cho mọi tiến trình và các lần chạy")
+    args = parser.parse_args(argv)
+    if args.time_budget >= args.timeout:
+        parser.error("--time-budget phải nhỏ hơn --timeout")
+    max_pending = args.max_pending or 4 * args.workers
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    runner = MathJobRunner(args.workers, cache_path=args.cache)
+    if args.profile or args.cprofile:
+        runner.profiler = Profiler(max_records=None, cprofile=bool(args.cprofile))
+    start = time.perf_counter()
+    in_flight = 0
+    counts = {}
+
+    def write(job, status, value, submitted):
+        out.write(format_job_result(job, status, value, time.perf_counter() - submitted) + "\n")
+        out.flush()
+        counts[status] = counts.get(status, 0) + 1
+
+    def make_callback(job, submitted):
+        def done(status, value):
+            nonlocal in_flight
+            in_flight -= 1
+            write(job, status, value, submitted)
+        return done
+
+    try:
+        jobs = read_jobs(args.input)
+        exhausted = False
+        while True:
+            while not exhausted and in_flight < max_pending:
+                job, problem = next(jobs, (None, None))
+                if job is None:
+                    exhausted = True
+                    break
+                submitted = time.perf_counter()
+                if problem is not None:
+                    write(job, "error", problem, submitted)
+                    continue
+                try:
+                    operation, call_args = job_call(job)
+                    # Cùng biểu thức (chuẩn hóa như khóa của parse_expression) thì ưu tiên cùng tiến trình
+                    key = normalize_expression(job["expression"])
+                    timeout = float(job.get("timeout", args.timeout))
+                    time_budget = float(job.get("time_budget", args.time_budget))
+                except (AttributeError, KeyError, TypeError, ValueError, sp.SympifyError) as e:
+                    write(job, "error", e, submitted)
+                    continue
+                in_flight += 1
+                runner.submit(operation, call_args, timeout, make_callback(job, submitted),
+                              job.get("mode", args.mode), key=key, time_budget=time_budget)
+            if exhausted and in_flight == 0:
+                break
+            runner.wait(0.1)
+    finally:
+        runner.shutdown()
+        if out is not sys.stdout:
+            out.close()
+        if args.profile:
+            runner.profiler.export_json(args.profile)
+        if args.cprofile and runner.profiler.stats is not None:
+            runner.profiler.dump_cprofile(args.cprofile)
+
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - start
+    summary = ", ".join(f"{status}: {n}" for status, n in sorted(counts.items()))
+    print(f"Đã chạy {total} công việc trong {elapsed:.2f} s ({total / max(elapsed, 1e-9):.1f} việc/s; {summary})",
+          file=sys.stderr)
+    return 0 if counts.get("error", 0) == 0 else 1
+
+# Số lần thử nạp nền trong --startup-time trước khi báo lỗi
+WARM_UP_ATTEMPTS = 3
+
+def measure_startup(attempts=WARM_UP_ATTEMPTS):
+    """ Chế độ --startup-time: in thời gian tới khi cửa sổ hiện và tới khi nạp nền xong, rồi thoát.
+
+    Nạp nền lỗi thì thử lại tối đa attempts lần, sau đó in lỗi và trả mã 1.
+    """
+    app = App()
+    app.update()
+    shown = time.perf_counter() - _START
+    for attempt in range(attempts):
+        if attempt:
+            app.warm_error = None
+            app.warm_thread = threading.Thread(target=app.warm_up, daemon=True)
+            app.warm_thread.start()
+        # Luồng nền được khởi động qua after_idle: chờ tới khi nó chạy xong hoặc báo lỗi
+        while app.warm_thread.is_alive() or not (app.warm_times or app.warm_error):
+            app.update()
+            time.sleep(0.01)
+        if app.warm_error is None:
+            break
+    warmed = time.perf_counter() - _START
+    app.on_close()
+
+    if app.warm_error is not None:
+        print(f"Nạp nền thất bại sau {attempts} lần thử: {app.warm_error}", file=sys.stderr)
+        return 1
+
+    print(f"Cửa sổ hiện sau: {shown * 1e3:.0f} ms")
+    print(f"Nạp nền xong sau: {warmed * 1e3:.0f} ms")
+    for name, seconds in app.warm_times.items():
+        print(f"  {name}: {seconds * 1e3:.0f} ms")
+    return 0
+
 if __name__ == "__main__":
+    if sys.argv[1:] == ["--startup-time"]:
+        sys.exit(measure_startup())
+    if len(sys.argv) > 1:
+        sys.exit(main())
     app = App()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""Đo hiệu năng (benchmark) cho bộ giải hệ phương trình, công cụ giải tích và tăng cường ảnh.
+
+Chạy không cần giao diện:
+    python benchmark.py run -o ket_qua.json
+    python benchmark.py run --suite solver --repeat 3 -o moi.json
+    python benchmark.py compare cu.json moi.json --threshold 0.1
+"""
+import argparse
+import json
+import platform
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+SEED = 12345
+
+# Bộ biểu thức cố định cho MathTool: (biểu thức, biến, điểm giới hạn, cận dưới, cận trên)
+EXPRESSION_CORPUS = [
+    ("(x**2 - 1)/(x - 1)", "x", 1, 0, 2),
+    ("sin(x)/x", "x", 0, 1, 3),
+    ("x**3 - 3*x + 2", "x", 2, -1, 1),
+    ("exp(-x**2)", "x", 0, -1, 1),
+    ("x*log(x)", "x", 1, 1, 2),
+    ("1/(1 + x**2)", "x", 0, 0, 1),
+    ("sqrt(1 + x)*cos(x)", "x", 0, 0, 1),
+]
+
+EQUATION_CORPUS = ["x**2 - 1", "x**3 - 6*x**2 + 11*x - 6", "sin(x) - 1/2", "exp(x) - 2"]
+
+SURFACE_CORPUS = ["x**2 + y**2", "sin(x)*cos(y)", "exp(-(x**2 + y**2))"]
+
+
+def measure(func, repeat=5, setup=None):
+    """ Đo thời gian func() qua nhiều lần chạy, kèm bộ nhớ đỉnh (tracemalloc) của một lần chạy. """
+    if setup:
+        setup()
+    func()  # Chạy khởi động, không tính giờ
+
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "max": max(times),
+        "peak_memory_bytes": peak,
+    }
+
+
+def bench_solver(repeat, quick=False):
+    """ gaussian_elimination / LU / batch so với numpy.linalg.solve, theo n và kích thước lô. """
+    from B1_UDgiaihepttt import LinearEquationSolver, batch_gaussian_elimination
+
+    rng = np.random.default_rng(SEED)
+    results = {}
+
+    for n in ([10, 50] if quick else [10, 50, 100, 200]):
+        A = rng.normal(size=(n, n)) + n * np.eye(n)
+        b = rng.normal(size=n)
+        results[f"solver/gaussian_elimination/n={n}"] = measure(
+            lambda: LinearEquationSolver(A, b).gaussian_elimination(), repeat)
+        results[f"solver/lu_solve/n={n}"] = measure(
+            lambda: LinearEquationSolver(A, b).solve(b), repeat)
+        results[f"solver/numpy_linalg_solve/n={n}"] = measure(
+            lambda: np.linalg.solve(A, b), repeat)
+
+    n = 5
+    for k in ([100] if quick else [100, 1000, 10000]):
+        A = rng.normal(size=(k, n, n)) + n * np.eye(n)
+        b = rng.normal(size=(k, n))
+        results[f"solver/loop_gaussian_elimination/n={n},k={k}"] = measure(
+            lambda: [LinearEquationSolver(A[i], b[i]).gaussian_elimination() for i in range(k)], repeat)
+        results[f"solver/batch_gaussian_elimination/n={n},k={k}"] = measure(
+            lambda: batch_gaussian_elimination(A, b), repeat)
+        results[f"solver/numpy_linalg_solve/n={n},k={k}"] = measure(
+            lambda: np.linalg.solve(A, b[..., None]), repeat)
+
+    return results
+
+
+def bench_math(repeat, quick=False):
+    """ Từng thao tác của MathTool trên bộ biểu thức cố định, không dùng bộ nhớ đệm. """
+    import sympy as sp
+    from B2_UDmongiaitich import MathTool, parse_expression
+
+    # Đo chính thuật toán SymPy: tắt bộ nhớ đệm kết quả và xóa cache phân tích
+    tool = MathTool(cache=False, mode="symbolic")
+
+    def clear():
+        sp.core.cache.clear_cache()
+        parse_expression.cache_clear()
+
+    corpus = EXPRESSION_CORPUS[:3] if quick else EXPRESSION_CORPUS
+    results = {}
+
+    for expr, var, point, lower, upper in corpus:
+        results[f"math/calculate_limit/{expr}"] = measure(
+            lambda: tool.calculate_limit(expr, var, point), repeat, clear)
+        results[f"math/calculate_derivative/{expr}"] = measure(
+            lambda: tool.calculate_derivative(expr, var, 2), repeat, clear)
+        results[f"math/calculate_integral/{expr}"] = measure(
+            lambda: tool.calculate_integral(expr, var, lower, upper), repeat, clear)
+
+        # Đường vẽ 2D: lambdify rồi tính trên 200 điểm như plot_2d_graph
+        x_vals = np.linspace(-10, 10, 200)
+        results[f"math/lambdify_2d/{expr}"] = measure(
+            lambda: sp.lambdify(tool.x, sp.sympify(expr), "numpy")(x_vals), repeat, clear)
+
+    for expr in (EQUATION_CORPUS[:2] if quick else EQUATION_CORPUS):
+        results[f"math/solve_equation/{expr}"] = measure(
+            lambda: tool.solve_equation(expr), repeat, clear)
+
+    # Đường vẽ 3D: lưới như plot_3d_graph
+    x_vals, y_vals = np.mgrid[-5:5:0.25, -5:5:0.25]
+    for expr in SURFACE_CORPUS:
+        results[f"math/lambdify_3d/{expr}"] = measure(
+            lambda: sp.lambdify((tool.x, tool.y), sp.sympify(expr), "numpy")(x_vals, y_vals),
+            repeat, clear)
+
+    return results
+
+
+def bench_image(repeat, quick=False):
+    """ Đường tăng cường CLAHE (enhance_array) theo kích thước ảnh. """
+    from B10_tangclhinhanh import enhance_array
+
+    rng = np.random.default_rng(SEED)
+    results = {}
+    for width, height in ([(320, 240)] if quick else [(320, 240), (1280, 960), (4000, 3000)]):
+        img = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+        results[f"image/clahe/{width}x{height}"] = measure(lambda: enhance_array(img), repeat)
+    return results
+
+
+def bench_startup(repeat, quick=False):
+    """ Thời gian khởi động: nạp module trong một tiến trình Python mới (gồm cả khởi động trình thông dịch). """
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {"startup/python": measure(
+        lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), repeat)}
+    for module in ["B2_UDmongiaitich", "B1_UDgiaihepttt"]:
+        results[f"startup/import/{module}"] = measure(
+            lambda: subprocess.run([sys.executable, "-c", f"import {module}"], cwd=here, check=True), repeat)
+    # Lần dùng SymPy đầu tiên sau khi nạp (phần chi phí được trì hoãn)
+    results["startup/first_derivative/B2_UDmongiaitich"] = measure(
+        lambda: subprocess.run([sys.executable, "-c",
+                                "import B2_UDmongiaitich as m; m.MathTool().calculate_derivative('x**2', 'x')"],
+                               cwd=here, check=True), repeat)
+    return results
+
+
+SUITES = {
+    "solver": bench_solver,
+    "math": bench_math,
+    "image": bench_image,
+    "startup": bench_startup,
+}
+
+
+def run(args):
+    results = {}
+    for name in args.suite or list(SUITES):
+        print(f"Đang đo nhóm '{name}'...", file=sys.stderr)
+        results.update(SUITES[name](args.repeat, args.quick))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": SEED,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 0
+
+
+def compare(args):
+    """ So sánh hai lần chạy: báo chậm đi nếu trung vị tăng quá ngưỡng. Trả về 1 nếu có hồi quy. """
+    with open(args.baseline, encoding="utf-8") as f:
+        old = json.load(f)["results"]
+    with open(args.current, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+
+    regressions = 0
+    for name in sorted(set(old) & set(new)):
+        ratio = new[name]["median"] / old[name]["median"] if old[name]["median"] else float("inf")
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "  <-- CHẬM HƠN"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = "  (nhanh hơn)"
+        print(f"{name:60s} {old[name]['median'] * 1e3:10.3f} ms -> {new[name]['median'] * 1e3:10.3f} ms"
+              f"  x{ratio:.2f}{flag}")
+
+    for name in sorted(set(old) ^ set(new)):
+        print(f"{name:60s} chỉ có trong {'bản cũ' if name in old else 'bản mới'}")
+
+    print(f"\n{regressions} trường hợp chậm hơn quá {args.threshold:.0%}.")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Đo hiệu năng các chương trình trong THb1_mnm.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Chạy benchmark và ghi kết quả JSON")
+    p_run.add_argument("-o", "--output", default="-", help="Tệp JSON đầu ra (mặc định stdout)")
+    p_run.add_argument("--suite", action="append", choices=list(SUITES), help="Chỉ chạy nhóm này (lặp lại được)")
+    p_run.add_argument("--repeat", type=int, default=5, help="Số lần đo mỗi trường hợp")
+    p_run.add_argument("--quick", action="store_true", help="Bộ nhỏ để kiểm tra nhanh")
+    p_run.set_defaults(func=run)
+
+    p_cmp = sub.add_parser("compare", help="So sánh hai tệp kết quả")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=0.10, help="Ngưỡng chậm đi tương đối (mặc định 0.10)")
+    p_cmp.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import cv2
+import pytest
+
+from B10_tangclhinhanh import enhance_array, enhance_large_image, enhance_tiled, find_images, main
+
+
+def _sample(height, width, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 200, size=(height, width, 3), dtype=np.uint8)
+
+
+def _reference(img):
+    """ enhance_large_image dùng cùng thứ tự kênh với enhance_image (RGB). """
+    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return cv2.cvtColor(enhance_array(rgb), cv2.COLOR_RGB2BGR)
+
+
+def test_tiled_narrow_image_keeps_src_unchanged():
+    # Ảnh hẹp hơn tile_size: mỗi khối là cả chiều ngang, vùng cắt liên tục trong bộ nhớ
+    img = _sample(600, 800)
+    before = img.copy()
+    out = np.empty_like(img)
+    enhance_tiled(img, out, tile_size=1024, swap_rb=True)
+    assert np.array_equal(img, before)
+    assert np.array_equal(out, _reference(before))
+
+
+def test_tiled_matches_whole_image_clahe():
+    img = _sample(517, 733, seed=1)
+    out = np.empty_like(img)
+    enhance_tiled(img, out, tile_size=128)
+    assert np.array_equal(out, enhance_array(img))
+
+
+def test_large_image_readonly_memmap(tmp_path):
+    img = _sample(600, 800, seed=2)
+    src = tmp_path / "a.npy"
+    dst = tmp_path / "o.npy"
+    np.save(src, img)
+
+    enhance_large_image(str(src), str(dst))
+
+    assert np.array_equal(np.load(src), img)
+    assert np.array_equal(np.load(dst), _reference(img))
+
+
+def test_find_images_skips_output_inside_input(tmp_path):
+    (tmp_path / "out" / "sub").mkdir(parents=True)
+    for path in ("a.png", "out/a.png", "out/sub/b.png"):
+        cv2.imwrite(str(tmp_path / path), _sample(8, 8, 0))
+    found = list(find_images(str(tmp_path), exclude=str(tmp_path / "out")))
+    assert found == [os.path.join(str(tmp_path), "a.png")]
+
+
+def test_main_rejects_missing_input(tmp_path):
+    with pytest.raises(SystemExit) as exc:
+        main([str(tmp_path / "missing"), str(tmp_path / "out")])
+    assert exc.value.code == 2
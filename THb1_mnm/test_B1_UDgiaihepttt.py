@@ -0,0 +1,190 @@
+import json
+import os
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import B1_UDgiaihepttt as b1
+
+
+def _poisson(n):
+    """ Ma trận sai phân 1 chiều: đối xứng xác định dương. """
+    return 2 * np.eye(n) - np.eye(n, k=1) - np.eye(n, k=-1)
+
+
+def _nonsymmetric(n, seed=0):
+    rng = np.random.default_rng(seed)
+    A = np.where(rng.random((n, n)) < 0.2, rng.standard_normal((n, n)), 0.0)
+    return A + n * np.eye(n)
+
+
+@pytest.mark.parametrize("method, preconditioner, matrix", [
+    ("cg", "jacobi", _poisson(40)),
+    ("cg", "ilu0", _poisson(40)),
+    ("gmres", "jacobi", _nonsymmetric(40)),
+    ("gmres", "ilu0", _nonsymmetric(40)),
+    ("bicgstab", "jacobi", _nonsymmetric(40)),
+    ("bicgstab", "ilu0", _nonsymmetric(40)),
+])
+def test_iterative_matches_dense_solve(method, preconditioner, matrix):
+    b = np.arange(1.0, len(matrix) + 1)
+    solver = b1.LinearEquationSolver(b1.SparseMatrix.from_dense(matrix), b)
+    x, info = solver.iterative_solve(method=method, preconditioner=preconditioner, tol=1e-10)
+    assert info["converged"]
+    np.testing.assert_allclose(x, np.linalg.solve(matrix, b), rtol=1e-6, atol=1e-8)
+
+
+def test_sparse_gaussian_elimination_and_engines():
+    A = _poisson(20)
+    b = np.ones(20)
+    for engine in ("classic", "blocked"):
+        solver = b1.LinearEquationSolver(b1.SparseMatrix.from_dense(A), b, engine=engine)
+        np.testing.assert_allclose(solver.gaussian_elimination(), np.linalg.solve(A, b), rtol=1e-6)
+    np.testing.assert_allclose(solver.solve(b), np.linalg.solve(A, b), rtol=1e-6)
+
+
+def test_sparse_singular_raises():
+    solver = b1.LinearEquationSolver(b1.SparseMatrix.from_dense(np.array([[1.0, 1.0], [1.0, 1.0]])),
+                                     np.array([1.0, 2.0]))
+    with pytest.raises(ValueError, match="không hội tụ"):
+        solver.gaussian_elimination()
+    with pytest.raises(ValueError, match="không hội tụ"):
+        solver.solve_many([[1.0, 2.0], [1.0, 1.0]])
+
+
+@pytest.mark.parametrize("save", [np.savez, np.savez_compressed])
+def test_read_systems_npz_streams_each_system(tmp_path, save):
+    rng = np.random.default_rng(1)
+    A = rng.standard_normal((5, 3, 3))
+    b = rng.standard_normal((5, 3))
+    path = tmp_path / "systems.npz"
+    save(path, A=A, b=b)
+    systems = list(b1.read_systems(str(path)))
+    assert len(systems) == 5
+    for (Ai, bi), (Aj, bj) in zip(systems, zip(A, b)):
+        np.testing.assert_array_equal(Ai, Aj)
+        np.testing.assert_array_equal(bi, bj)
+
+
+def test_format_result_writes_null_for_non_finite():
+    line = b1.format_result(0, np.array([1.0, np.nan, np.inf]))
+    assert json.loads(line)["x"] == [1.0, None, None]
+
+
+def test_out_of_core_scratch_next_to_matrix(tmp_path, monkeypatch):
+    A = _nonsymmetric(30)
+    np.save(tmp_path / "A.npy", A)
+    dirs = []
+    mkstemp = b1.tempfile.mkstemp
+    monkeypatch.setattr(b1.tempfile, "mkstemp", lambda **kw: dirs.append(kw.get("dir")) or mkstemp(**kw))
+    x = b1.out_of_core_gaussian_elimination(str(tmp_path / "A.npy"), np.ones(30), memory_budget=30 * 8 * 3 * 7)
+    np.testing.assert_allclose(A @ x, np.ones(30), atol=1e-10)
+    assert dirs == [str(tmp_path)]
+    assert sorted(os.listdir(tmp_path)) == ["A.npy"]
+
+
+SINGULAR = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0, 8.0, 9.0]])
+
+
+@pytest.mark.parametrize("b, status", [([1.0, 2.0, 4.0], "Vô nghiệm"), ([1.0, 2.0, 3.0], "Vô số nghiệm")])
+def test_singular_detected_with_rounding(b, status):
+    solver = b1.LinearEquationSolver(SINGULAR, b)
+    assert solver.gaussian_elimination() == status
+    assert solver.solve(b) == status
+    assert solver.solve_many([b, b]) == [status, status]
+
+
+def test_batch_status_matches_gaussian_elimination():
+    zero_column = np.array([[0.0, 1.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    A = np.array([SINGULAR, SINGULAR, zero_column, 2 * np.eye(3)])
+    b = np.array([[1.0, 2.0, 4.0], [1.0, 2.0, 3.0], [1.0, 1.0, 1.0], [2.0, 4.0, 6.0]])
+    x, status = b1.batch_gaussian_elimination(A, b)
+    for s in range(len(b)):
+        expected = b1.LinearEquationSolver(A[s], b[s]).gaussian_elimination()
+        if isinstance(expected, str):
+            assert b1.STATUS_TEXT[status[s]] == expected
+            assert np.isnan(x[s]).all()
+        else:
+            assert status[s] == b1.UNIQUE
+            np.testing.assert_allclose(x[s], expected)
+    assert list(status) == [b1.NO_SOLUTION, b1.INFINITE_SOLUTIONS, b1.INFINITE_SOLUTIONS, b1.UNIQUE]
+
+
+@pytest.mark.parametrize("b, status", [([1.0, 2.0, 4.0], "Vô nghiệm"), ([1.0, 2.0, 3.0], "Vô số nghiệm")])
+def test_blocked_and_out_of_core_detect_singular(tmp_path, b, status):
+    assert b1.blocked_gaussian_elimination(SINGULAR, b, block_size=2) == status
+    np.save(tmp_path / "A.npy", SINGULAR)
+    assert b1.out_of_core_gaussian_elimination(str(tmp_path / "A.npy"), b, memory_budget=3 * 8 * 3 * 2) == status
+    # Khối lớn hơn: trụ suy biến bất kỳ đâu vẫn cho cùng kết luận với gaussian_elimination
+    rng = np.random.default_rng(2)
+    A = rng.standard_normal((40, 40))
+    A[:, 17] = A[:, 3] + A[:, 5]
+    rhs = A @ rng.standard_normal(40) if status == "Vô số nghiệm" else rng.standard_normal(40)
+    assert b1.blocked_gaussian_elimination(A, rhs, block_size=8) == status
+    assert b1.LinearEquationSolver(A, rhs).gaussian_elimination() == status
+    for budget in (40 * 8 * 3, 40 * 8 * 3 * 8):
+        assert b1.out_of_core_gaussian_elimination(A, rhs, memory_budget=budget) == status
+
+
+def test_bad_systems_do_not_stop_the_stream(tmp_path):
+    jsonl = tmp_path / "systems.jsonl"
+    jsonl.write_text("\n".join([
+        '{"A": [[2, 0], [0, 4]], "b": [2, 4]}',
+        '{"A": [[1, 0], [0]], "b": [1, 2]}',
+        '{not json',
+        '{"A": [[1, 0], [0, 1]]}',
+        '{"A": [[1, 2], [3, 4]], "b": [1, 2, 3]}',
+        '{"A": [[1, 0], [0, 1]], "b": [5, 6]}',
+    ]) + "\n", encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+    assert b1.main([str(jsonl), "-o", str(output), "--workers", "1", "--chunk-size", "2"]) == 1
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [r["status"] for r in records] == ["Nghiệm duy nhất", "error", "error", "error", "error",
+                                             "Nghiệm duy nhất"]
+    assert records[-1]["x"] == [5.0, 6.0]
+
+    csv_path = tmp_path / "systems.csv"
+    csv_path.write_text("1,0,0,1,3,4\n1,2,3\n1,a,0,1,1,1\n", encoding="utf-8")
+    results = dict(b1.solve_stream(b1.read_systems(str(csv_path)), workers=1))
+    assert list(results[0]) == [3.0, 4.0]
+    assert isinstance(results[1], ValueError) and isinstance(results[2], ValueError)
+
+
+def test_auto_preconditioner_falls_back_to_jacobi(monkeypatch):
+    A = b1.SparseMatrix.from_dense(_poisson(30))
+    b = np.ones(30)
+    assert b1.LinearEquationSolver(A, b).iterative_solve()[1]["preconditioner"] == "ilu0"
+    monkeypatch.setattr(b1, "ILU0_AUTO_MAX_N", 10)
+    x, info = b1.LinearEquationSolver(A, b).iterative_solve()
+    assert info["preconditioner"] == "jacobi" and info["converged"]
+    np.testing.assert_allclose(x, np.linalg.solve(_poisson(30), b), rtol=1e-6)
+
+
+def test_out_of_core_peak_memory_within_budget(tmp_path):
+    n, budget = 600, 600 * 8 * 4 * 40
+    A = _nonsymmetric(n)
+    np.save(tmp_path / "A.npy", A)
+    tracemalloc.start()
+    try:
+        x = b1.out_of_core_gaussian_elimination(str(tmp_path / "A.npy"), np.ones(n), memory_budget=budget)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    np.testing.assert_allclose(A @ x, np.ones(n), atol=1e-8)
+    assert peak <= budget
+
+
+def test_out_of_core_in_place_rejects_read_only(tmp_path):
+    np.save(tmp_path / "A.npy", np.eye(3))
+    with pytest.raises(ValueError, match="ghi được"):
+        b1.out_of_core_gaussian_elimination(np.load(tmp_path / "A.npy", mmap_mode="r"), np.ones(3), in_place=True)
+
+
+@pytest.mark.parametrize("delta, steps", [(120, [-1]), (-240, [2]), (1, [-1]), (-3, [1]), (0, [])])
+def test_mouse_wheel_direction(delta, steps):
+    calls = []
+    grid = SimpleNamespace(yview=lambda *args: calls.append(args[1]))
+    b1.MatrixGrid.on_wheel(grid, SimpleNamespace(delta=delta))
+    assert calls == steps
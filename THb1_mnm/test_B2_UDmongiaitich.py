@@ -0,0 +1,133 @@
+import json
+import threading
+
+import numpy as np
+import sympy as sp
+
+import B2_UDmongiaitich as b2
+
+
+def test_cprofile_with_time_budget_does_not_nest():
+    profiler = b2.Profiler(cprofile=True)
+    tool = b2.MathTool(cache=False, profiler=profiler, time_budget=0.5)
+    assert str(tool.calculate_limit("sin(x)/x", "x", 0)) == "1"
+    # Tích phân này quá giờ: luồng SymPy bị bỏ lại nhưng lần gọi sau vẫn phải chạy được
+    tool.calculate_integral("exp(-x**2)*sin(x)**2*log(x)**3*tan(x)", sp.Symbol("x"), 1, 1.5)
+    assert str(tool.calculate_derivative("x**3", "x")) == "3*x**2"
+    assert [r["operation"] for r in profiler.records] == ["limit", "integral", "derivative"]
+    assert profiler.stats is not None
+
+
+def test_timeout_fallback_is_not_cached(tmp_path):
+    cache = b2.ResultCache(path=str(tmp_path / "cache.sqlite"))
+    tool = b2.MathTool(cache=cache, time_budget=0.3)
+    x = sp.Symbol("x")
+    result = tool.calculate_integral("exp(-x**2)*sin(x)**2*log(x)**3*tan(x)", x, 1, 1.5)
+    assert isinstance(result, b2.NumericResult)
+    assert tool.timeouts == 1
+    assert len(cache.entries) == 0
+    assert cache.db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+    tool.calculate_derivative("x**3", x)
+    assert len(cache.entries) == 1
+
+
+def test_normalize_expression_shares_parse_cache():
+    assert b2.normalize_expression("  sin( x ) + 2 * x ") == "sin(x)+2*x"
+    assert b2.normalize_expression("x  y") == "x y"
+    assert b2.parse_expression("x**2 + 1") is b2.parse_expression("x**2+1")
+
+
+def test_gauss_kronrod_log_singularity_terminates():
+    result = b2.gauss_kronrod(lambda x: np.log(np.abs(x - 1 / 3)), 0, 1)
+    exact = (2 / 3) * np.log(2 / 3) + (1 / 3) * np.log(1 / 3) - 1
+    assert abs(result.value - exact) < 1e-8
+    tool = b2.MathTool(cache=False, mode="numeric")
+    assert abs(tool.calculate_integral("log(Abs(x - 1/3))", sp.Symbol("x"), 0, 1).value - exact) < 1e-8
+
+
+def test_gauss_kronrod_reports_divergence():
+    result = b2.gauss_kronrod(lambda x: 1 / x, -1, 1)
+    assert not np.isfinite(result.value)
+    assert abs(b2.gauss_kronrod(lambda x: 1 / np.sqrt(np.abs(x)), -1, 1).value - 4) < 1e-8
+
+
+def test_batch_bad_lines_do_not_stop_the_run(tmp_path):
+    jobs = tmp_path / "jobs.jsonl"
+    jobs.write_text("\n".join([
+        '{"operation": "derivative", "expression": "x**2"}',
+        '{not json',
+        '[1, 2]',
+        '{"operation": "derivative"}',
+        '{"operation": "derivative", "expression": 3}',
+        '{"operation": "derivative", "expression": "x", "timeout": "soon"}',
+        '{"operation": "derivative", "expression": "x**3", "time_budget": null}',
+        '{"operation": "derivative", "expression": "x**3"}',
+    ]) + "\n", encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+    assert b2.main([str(jobs), "-o", str(output), "--workers", "1"]) == 1
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    status = {record["id"]: record["status"] for record in records}
+    assert status == {0: "ok", 1: "error", 2: "error", 3: "error", 4: "error", 5: "error", 6: "error", 7: "ok"}
+
+
+def test_worker_results_shared_through_disk_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    runner = b2.MathJobRunner(1, cache_path=path)
+    results = []
+    try:
+        for _ in range(2):
+            runner.submit("calculate_derivative", ("x**5", sp.Symbol("x"), 1), 60,
+                          lambda status, value: results.append((status, value)))
+            while runner.running or runner.pending:
+                runner.wait()
+            # Thay tiến trình con: kết quả phải còn trong kho đĩa dùng chung
+            runner.cancel(runner.submit("calculate_derivative", ("x", sp.Symbol("x"), 1), 60, lambda *a: None))
+    finally:
+        runner.shutdown()
+    assert [status for status, _ in results] == ["ok", "ok"]
+    cache = b2.ResultCache(path=path)
+    tool = b2.MathTool(cache=cache)
+    assert str(tool.calculate_derivative("x**5", "x")) == "5*x**4"
+    assert cache.disk_hits == 1 and cache.misses == 0
+
+
+def test_lod_surface_validates_ranges_and_keeps_budget():
+    f = lambda x, y: np.sin(x) * np.cos(y)
+    for x_range, y_range in [((-1, 1), (2, 2)), ((1, -1), (0, 1)), ((0, np.inf), (0, 1))]:
+        try:
+            b2.lod_surface(f, x_range, y_range)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError((x_range, y_range))
+    for x_range, y_range in [((0, 1e6), (0, 1e-3)), ((0, 1e-3), (0, 1e6)), ((-5, 5), (-5, 5))]:
+        x, y, z, triangles = b2.lod_surface(f, x_range, y_range, target_triangles=2000)
+        assert len(triangles) <= 2000
+
+
+def test_measure_startup_stops_after_failed_warm_up(monkeypatch, capsys):
+    class FakeApp:
+        warm_up = b2.App.warm_up
+
+        def __init__(self):
+            self.warm_times, self.warm_error, self.closed = {}, None, False
+            self.warm_thread = threading.Thread(target=self.warm_up, daemon=True)
+            self.warm_thread.start()
+
+        def update(self):
+            pass
+
+        def on_close(self):
+            self.closed = True
+
+    calls = []
+
+    def broken_import(name):
+        calls.append(name)
+        raise ImportError("no display")
+
+    monkeypatch.setattr(b2, "App", FakeApp)
+    monkeypatch.setattr(b2.importlib, "import_module", broken_import)
+    assert b2.measure_startup(attempts=3) == 1
+    assert calls == ["sympy"] * 3
+    assert "no display" in capsys.readouterr().err
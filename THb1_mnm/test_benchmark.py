@@ -0,0 +1,15 @@
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_run_quick(tmp_path):
+    output = tmp_path / "ket_qua.json"
+    subprocess.run([sys.executable, "benchmark.py", "run", "--quick", "--repeat", "1", "-o", str(output)],
+                   cwd=HERE, check=True)
+    results = json.loads(output.read_text(encoding="utf-8"))["results"]
+    assert any(name.startswith("math/") for name in results)
+    assert all(record["median"] >= 0 for record in results.values())